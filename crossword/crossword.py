@@ -3,29 +3,34 @@ class Variable():
     ACROSS = "across"
     DOWN = "down"
 
-    def __init__(self, i, j, direction, length):
-        """Create a new variable with starting point, direction, and length."""
-        self.i = i
-        self.j = j
-        self.direction = direction
-        self.length = length
-        self.cells = []
-        for k in range(self.length):
-            self.cells.append(
-                (self.i + (k if self.direction == Variable.DOWN else 0),
-                 self.j + (k if self.direction == Variable.ACROSS else 0))
-            )
+    __slots__ = ("i", "j", "direction", "length", "id", "cells", "_key", "_hash")
+
+    def __init__(self, i, j, direction, length, id=None):
+        """
+        Create a new variable with starting point, direction, and length.
+        `id` is its dense integer number in its crossword, used to index
+        per-variable tables. Variables are immutable.
+        """
+        cells = tuple(
+            (i + (k if direction == Variable.DOWN else 0),
+             j + (k if direction == Variable.ACROSS else 0))
+            for k in range(length)
+        )
+        key = (i, j, direction, length)
+        for name, value in zip(self.__slots__, (i, j, direction, length, id, cells, key, hash(key))):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Variable is immutable")
+
+    def __reduce__(self):
+        return (Variable, (self.i, self.j, self.direction, self.length, self.id))
 
     def __hash__(self):
-        return hash((self.i, self.j, self.direction, self.length))
+        return self._hash
 
     def __eq__(self, other):
-        return (
-            (self.i == other.i) and
-            (self.j == other.j) and
-            (self.direction == other.direction) and
-            (self.length == other.length)
-        )
+        return isinstance(other, Variable) and self._key == other._key
 
     def __str__(self):
         return f"({self.i}, {self.j}) {self.direction} : {self.length}"
@@ -35,6 +40,13 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class Overlaps(dict):
+    """Overlaps of crossing variable pairs; any other pair overlaps in None."""
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
     def __init__(self, structure_file, words_file):
@@ -60,9 +72,11 @@ class Crossword():
         # Save vocabulary list
         with open(words_file) as f:
             self.words = set(f.read().upper().splitlines())
+        self._index = None
+        self._digest = None
 
         # Determine variable set
-        self.variables = set()
+        starts = []
         for i in range(self.height):
             for j in range(self.width):
 
@@ -79,11 +93,7 @@ class Crossword():
                         else:
                             break
                     if length > 1:
-                        self.variables.add(Variable(
-                            i=i, j=j,
-                            direction=Variable.DOWN,
-                            length=length
-                        ))
+                        starts.append((i, j, Variable.DOWN, length))
 
                 # Horizontal words
                 starts_word = (
@@ -98,39 +108,111 @@ class Crossword():
                         else:
                             break
                     if length > 1:
-                        self.variables.add(Variable(
-                            i=i, j=j,
-                            direction=Variable.ACROSS,
-                            length=length
-                        ))
+                        starts.append((i, j, Variable.ACROSS, length))
+
+        # Number variables densely in (i, j, direction) order; `ordered[id]`
+        # is the variable with that id
+        self.ordered = [
+            Variable(i, j, direction, length, id)
+            for id, (i, j, direction, length) in enumerate(sorted(starts))
+        ]
+        self.variables = set(self.ordered)
+        self._ids = {v: v.id for v in self.ordered}
 
-        # Compute overlaps for each word
+        # Compute overlaps for each word, from the variables covering each cell
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # `crossings[id]` lists (other id, i, j) for the variables crossing
+        # variable `id`, in id order
+        covering = dict()
+        for v in self.ordered:
+            for k, cell in enumerate(v.cells):
+                covering.setdefault(cell, []).append((v, k))
+        self.overlaps = Overlaps()
+        self.crossings = [[] for _ in self.ordered]
+        for cell, variables in covering.items():
+            for v1, k1 in variables:
+                for v2, k2 in variables:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (k1, k2)
+                        self.crossings[v1.id].append((v2.id, k1, k2))
+        for crossings in self.crossings:
+            crossings.sort()
+        self._neighbors = [
+            frozenset(self.ordered[other] for other, _, _ in crossings)
+            for crossings in self.crossings
+        ]
+
+        # Connected components of the crossing graph, as sorted lists of ids:
+        # variables of different components share no cell
+        self.components = []
+        seen = set()
+        for start in range(len(self.ordered)):
+            if start in seen:
+                continue
+            seen.add(start)
+            component, stack = [], [start]
+            while stack:
+                var = stack.pop()
+                component.append(var)
+                for other, _, _ in self.crossings[var]:
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+            self.components.append(sorted(component))
+
+    @property
+    def index(self):
+        """Wildcard query index of the vocabulary, built on first use."""
+        if self._index is None:
+            from word_index import WordIndex
+            self._index = WordIndex(self.words)
+        return self._index
+
+    @property
+    def digest(self):
+        """Hash of the structure and vocabulary, identifying the puzzle to fill."""
+        if self._digest is None:
+            import hashlib
+            h = hashlib.blake2b(digest_size=20)
+            for row in self.structure:
+                h.update("".join("_" if cell else "#" for cell in row).encode() + b"\n")
+            h.update(b"\0")
+            for word in sorted(self.words):
+                h.update(word.encode("utf-8") + b"\n")
+            self._digest = h.hexdigest()
+        return self._digest
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return set(self._neighbors[self.id_of(var)])
+
+    def id_of(self, var):
+        """Return the id of a variable, also for an equal variable created without one."""
+        return var.id if var.id is not None else self._ids[var]
+
+    def check_pins(self, pinned):
+        """
+        Return `pinned`, a mapping of variables to words, with its words in
+        upper case. Raise ValueError if a word does not fit its variable.
+        """
+        checked = dict()
+        for var, word in pinned.items():
+            if var not in self.variables:
+                raise ValueError(f"{var} is not an entry of this crossword")
+            if len(word) != var.length:
+                raise ValueError(f"{word!r} does not fit {var}")
+            checked[var] = word.upper()
+        return checked
+
+    def variable_at(self, i, j, direction):
+        """Return the variable starting at (i, j) in a direction, or raise ValueError."""
+        for v in self.ordered:
+            if (v.i, v.j, v.direction) == (i, j, direction):
+                return v
+        raise ValueError(f"no {direction} entry starts at ({i}, {j})")
+
 
 class Structure:
 
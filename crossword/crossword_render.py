@@ -0,0 +1,111 @@
+import os
+from functools import lru_cache
+
+
+FONT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "assets", "fonts", "OpenSans-Regular.ttf"
+)
+
+
+@lru_cache(maxsize=None)
+def load_font(path=FONT_PATH, size=80):
+    """Load a TrueType font once per process."""
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size)
+
+
+class CrosswordRenderer():
+
+    def __init__(self, structure, cell_size=100, cell_border=2, font_size=80):
+        """
+        Create a renderer for a crossword structure (a 2D list of booleans,
+        True for open cells).
+
+        The grid background is drawn once, and each letter is rasterized once
+        into a mask centered in a cell; rendering an assignment then only
+        copies the background and pastes one mask per filled cell.
+        """
+        self.structure = structure
+        self.height = len(structure)
+        self.width = len(structure[0]) if structure else 0
+        self.cell_size = cell_size
+        self.cell_border = cell_border
+        self.interior_size = cell_size - 2 * cell_border
+        self.font = load_font(FONT_PATH, font_size)
+        self.glyphs = dict()
+        self.background = self._draw_background()
+
+    def _draw_background(self):
+        from PIL import Image, ImageDraw
+
+        cell_size, cell_border = self.cell_size, self.cell_border
+        img = Image.new(
+            "RGBA",
+            (self.width * cell_size, self.height * cell_size),
+            "black"
+        )
+        draw = ImageDraw.Draw(img)
+        for i in range(self.height):
+            for j in range(self.width):
+                if self.structure[i][j]:
+                    draw.rectangle([
+                        (j * cell_size + cell_border,
+                         i * cell_size + cell_border),
+                        ((j + 1) * cell_size - cell_border,
+                         (i + 1) * cell_size - cell_border)
+                    ], fill="white")
+        return img
+
+    def glyph(self, letter):
+        """
+        Return the mask of `letter` and its offset from the top-left corner
+        of a cell's interior, rasterizing it on first use.
+        """
+        if letter not in self.glyphs:
+            from PIL import Image, ImageDraw
+
+            left, top, right, bottom = self.font.getbbox(letter)
+            mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+            ImageDraw.Draw(mask).text((-left, -top), letter, fill=255, font=self.font)
+            # Center horizontally on the glyph itself, but vertically on the
+            # capital height so that all letters share a baseline
+            _, cap_top, _, cap_bottom = self.font.getbbox("H")
+            offset = (
+                (self.interior_size - mask.width) // 2,
+                (self.interior_size - (cap_bottom - cap_top)) // 2 + top - cap_top
+            )
+            self.glyphs[letter] = (mask, offset)
+        return self.glyphs[letter]
+
+    def render(self, letters):
+        """
+        Return an image of the grid filled with `letters`, a 2D list of
+        letters (or None for empty cells) as built by
+        `CrosswordCreator.letter_grid`.
+        """
+        img = self.background.copy()
+        cell_size, cell_border = self.cell_size, self.cell_border
+        for i in range(self.height):
+            for j in range(self.width):
+                if self.structure[i][j] and letters[i][j]:
+                    mask, (dx, dy) = self.glyph(letters[i][j])
+                    img.paste("black", (
+                        j * cell_size + cell_border + dx,
+                        i * cell_size + cell_border + dy
+                    ), mask)
+        return img
+
+
+@lru_cache(maxsize=32)
+def _renderer(structure, cell_size, cell_border, font_size):
+    return CrosswordRenderer([list(row) for row in structure], cell_size, cell_border, font_size)
+
+
+def renderer_for(structure, cell_size=100, cell_border=2, font_size=80):
+    """
+    Return a shared renderer for `structure`, so batch renders of the same
+    structure reuse its background and glyphs.
+    """
+    key = tuple(tuple(row) for row in structure)
+    return _renderer(key, cell_size, cell_border, font_size)
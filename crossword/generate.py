@@ -1,19 +1,65 @@
+import os
+import random
 import sys
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 
-from crossword import *
+from crossword import Crossword, Variable
+from crossword_render import renderer_for
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.csp import CSP, AllDifferent, KeyEqual, smallest_domain
+from puzzleskdp.seeding import derive_seed, make_rng, parse_seed
 
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    def __init__(self, crossword, seed=None, backjumping=False, nogoods=10000, cache=None):
         """
         Create new CSP crossword generate.
+        `seed` breaks ties between equally good words, so the same structure,
+        vocabulary and seed always produce the same fill.
+        If `backjumping`, search with conflict-directed backjumping, learning
+        up to `nogoods` forbidden word combinations (see `backjump`).
+        Seeded solves are looked up in and saved to `cache`, a
+        `puzzleskdp.solve_cache.ResultCache`, if given.
         """
         self.crossword = crossword
-        self.domains = {
-            var: self.crossword.words.copy()
-            for var in self.crossword.variables
-        }
+        self.seed = seed
+        self.backjumping = backjumping
+        self.cache = cache
+        # Number of solves and re-solves so far; each searches with its own
+        # generator, derived from the seed and this number (see `reseed`)
+        self.solves = 0
+        self.nogoods = NogoodTable(nogoods)
+        # Counters of the last search on the CSP engine
+        self.stats = None
+        self.rng = random.Random() if seed is None else make_rng(seed)
+        # Variables are numbered densely by the crossword, in (i, j,
+        # direction) order; the solver works on these ids, and indexes its
+        # domains, crossings and partial assignments by them
+        self.variables = self.crossword.ordered
+        self.crossings = self.crossword.crossings
+        self.overlaps = [
+            {other: (i, j) for other, i, j in crossings}
+            for crossings in self.crossings
+        ]
+        self.domains = [self.crossword.words.copy() for _ in self.variables]
+        # Domains after node consistency, and after arc consistency, kept by
+        # `propagate` so that later solves and re-solves start from them
+        self.node_domains = None
+        self.propagated = None
+        # Residual supports of `revise`: for each arc (x, y), a word of y
+        # with each letter at the crossing
+        self.residues = dict()
+
+    def __getstate__(self):
+        # Workers of `solve_components` receive a copy of the creator; the
+        # cache's database connection cannot be pickled, and only the parent
+        # process reads and writes the cache
+        state = self.__dict__.copy()
+        state["cache"] = None
+        return state
 
     def letter_grid(self, assignment):
         """
@@ -47,51 +93,247 @@ class CrosswordCreator():
     def save(self, assignment, filename):
         """
         Save crossword assignment to an image file.
+        The renderer (background and letter glyphs) is cached per structure.
+        The seed, if any, is recorded in the metadata of PNG files.
         """
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
-        letters = self.letter_grid(assignment)
+        from PIL import PngImagePlugin
+        img = renderer_for(self.crossword.structure).render(self.letter_grid(assignment))
+
+        if self.seed is not None and filename.lower().endswith(".png"):
+            info = PngImagePlugin.PngInfo()
+            info.add_text("Seed", str(self.seed))
+            img.save(filename, pnginfo=info)
+        else:
+            img.save(filename)
+
+    def solve(self, pinned=None, workers=None):
+        """
+        Enforce node and arc consistency, and then solve the CSP.
+        `pinned` maps variables to words they must take, e.g. theme entries;
+        pinned words need not be in the vocabulary. Independent parts of the
+        structure are solved separately, on `workers` processes if more
+        than one (see `solve_components`).
+        Return a mapping of variables to words, or None.
+        """
+        pinned = self.check_pins(pinned or dict())
+        key = self.cache_key(pinned)
+        self.reseed()
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats = cached["stats"]
+                return self.to_assignment(cached["values"])
+
+        values = self.solve_values(pinned, workers)
+        if key is not None:
+            self.cache.put(key, {"values": values, "stats": self.stats})
+        return self.to_assignment(values)
+
+    def reseed(self):
+        """
+        Give the next solve its own generator, derived from the seed and the
+        number of earlier solves, so that its result does not depend on how
+        many numbers earlier solves drew (none when read from the cache).
+        The first solve uses the seed itself.
+        """
+        if self.seed is not None:
+            seed = self.seed if self.solves == 0 else derive_seed(self.seed, "solve", self.solves)
+            self.rng = make_rng(seed)
+        self.solves += 1
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size,
-             self.crossword.height * cell_size),
-            "black"
+    def cache_key(self, pinned):
+        """
+        Return the content address of a solve with `pinned` words: a hash of
+        the structure, vocabulary, solver settings, seed and pins, and of
+        the number of earlier solves, which selects the solve's generator.
+        Return None if results are not cached, or not reproducible (unseeded).
+        """
+        if self.cache is None or self.seed is None:
+            return None
+        from puzzleskdp.solve_cache import content_key
+        return content_key(
+            "crossword", self.crossword.digest,
+            {"solver": "backtrack", "backjumping": self.backjumping},
+            self.seed, self.solves, sorted(pinned.items())
         )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
 
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
+    def solve_values(self, pinned, workers=None):
+        """Solve with `pinned` words keyed by id; return the word of each id, or None."""
+        self.propagate()
+        self.domains = self.start_domains(pinned)
+        for var, word in pinned.items():
+            self.domains[var] = {word}
+        if pinned and not self.ac3(self.arcs_into(range(len(self.variables)))):
+            return None
+        values = [None] * len(self.variables)
+        for var, word in pinned.items():
+            values[var] = word
+        return self.solve_components(values, workers)
+
+    def solve_components(self, values, workers=None):
+        """
+        Complete `values` by solving each connected component of the crossing
+        graph on its own, so that the search costs the sum rather than the
+        product of the components' costs.
+
+        Components only interact through the distinct words rule: a component
+        reusing a word of an earlier one is solved again with those words
+        excluded, and if that fails the whole grid is searched at once.
+        Each component draws from its own seeded generator, so the fill does
+        not depend on `workers`.
+        """
+        components = self.crossword.components
+        if len(components) == 1:
+            return self.search(values)
+        assigned = [word for word in values if word is not None]
+        if len(set(assigned)) != len(assigned):
+            return None
+
+        tasks = [(self, values, component, k) for k, component in enumerate(components)]
+        if workers is not None and workers > 1:
+            with ProcessPoolExecutor(workers) as executor:
+                results = list(executor.map(solve_component, *zip(*tasks)))
+        else:
+            results = [solve_component(*task) for task in tasks]
+        if any(result is None for result in results):
+            return None
+
+        solution = list(values)
+        taken = set()
+        for k, (component, result) in enumerate(zip(components, results)):
+            if taken.intersection(result[var] for var in component):
+                result = solve_component(self, values, component, k, taken)
+                if result is None:
+                    return self.search(values)
+            for var in component:
+                solution[var] = result[var]
+                taken.add(result[var])
+        return solution
+
+    def component_rng(self, k):
+        """Return the random generator of the `k`th component."""
+        if self.seed is None:
+            return random.Random(self.rng.getrandbits(64))
+        return make_rng(derive_seed(self.seed, "component", k))
+
+    def resolve(self, assignment, changes, pinned=None):
+        """
+        Repair a solved `assignment` after `changes`, a mapping of variables
+        to their new word, or to None to replace their current word.
 
-                rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        w, h = draw.textsize(letters[i][j], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior_size - w) / 2),
-                             rect[0][1] + ((interior_size - h) / 2) - 10),
-                            letters[i][j], fill="black", font=font
-                        )
+        Only the changed entries are re-filled at first, keeping every other
+        word; if that fails, the crossing entries are freed as well, one ring
+        at a time, until a fill is found. `pinned` entries are never changed.
+        Return the new assignment, or None if there is no solution.
+        """
+        pinned = dict(pinned or dict())
+        rejected = dict()
+        for var, word in changes.items():
+            if word is None:
+                rejected[self.crossword.id_of(var)] = assignment.get(var)
+            else:
+                pinned[var] = word
+        pinned = self.check_pins(pinned)
+        self.propagate()
+        self.reseed()
+
+        values = self.to_values(assignment)
+        region = {self.crossword.id_of(var) for var in changes}
+        while True:
+            result = self.solve_region(values, region, pinned, rejected)
+            if result is not None:
+                return self.to_assignment(result)
+            grown = region.union(*(
+                (other for other, _, _ in self.crossings[var]) for var in region
+            ))
+            if grown == region:
+                return None
+            region = grown
+
+    def solve_region(self, values, region, pinned, rejected):
+        """
+        Solve for the variables in `region` (and any unassigned ones), with
+        every other variable fixed to its word in `values`.
+        """
+        free = {var for var, word in enumerate(values) if var in region or word is None}
+        free -= pinned.keys()
+        fixed = {var: word for var, word in enumerate(values) if var not in free}
+        fixed.update(pinned)
+
+        self.domains = self.start_domains(fixed)
+        for var, word in fixed.items():
+            self.domains[var] = {word}
+        for var, word in rejected.items():
+            self.domains[var].discard(word)
+        values = [fixed.get(var) for var in range(len(self.variables))]
+        # A pinned or changed word may conflict with a fixed crossing word;
+        # with no free variable around it, the search would never look
+        if len(set(fixed.values())) != len(fixed) or not all(
+            self.value_consistent(var, word, values) for var, word in fixed.items()
+        ):
+            return None
+        if not self.ac3(self.arcs_into(free)):
+            return None
+        return self.search(values)
+
+    def check_pins(self, pinned):
+        """
+        Return `pinned` keyed by variable id, with its words in upper case.
+        Raise ValueError if a word does not fit its variable.
+        """
+        return {
+            self.crossword.id_of(var): word
+            for var, word in self.crossword.check_pins(pinned).items()
+        }
 
-        img.save(filename)
+    def to_values(self, assignment):
+        """Return a mapping of variables to words as a list indexed by id."""
+        values = [None] * len(self.variables)
+        for var, word in assignment.items():
+            values[self.crossword.id_of(var)] = word
+        return values
+
+    def to_assignment(self, values):
+        """Return a list of words indexed by id as a mapping of variables to words."""
+        if values is None:
+            return None
+        return {
+            self.variables[var]: word
+            for var, word in enumerate(values)
+            if word is not None
+        }
 
-    def solve(self):
+    def propagate(self):
         """
-        Enforce node and arc consistency, and then solve the CSP.
+        Compute the node consistent and arc consistent domains once.
+        """
+        if self.propagated is None:
+            self.enforce_node_consistency()
+            self.node_domains = [set(words) for words in self.domains]
+            self.ac3()
+            self.propagated = [set(words) for words in self.domains]
+
+    def start_domains(self, fixed):
+        """
+        Return a copy of the domains to search from when the variables in
+        `fixed` are set to their words. Arc consistent domains were pruned
+        against the vocabulary only, so they cannot be used when a fixed word
+        is outside of them (e.g. a pinned theme entry).
+        """
+        domains = self.propagated
+        if any(word not in domains[var] for var, word in fixed.items()):
+            domains = self.node_domains
+        return [set(words) for words in domains]
+
+    def arcs_into(self, variables):
+        """
+        Return the arcs (x, y) for each x in `variables` and each neighbor y.
         """
-        self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        return [
+            (x, y)
+            for x in sorted(variables)
+            for y, _, _ in self.crossings[x]
+        ]
 
     def enforce_node_consistency(self):
         """
@@ -99,70 +341,55 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        for variable in self.domains:
-            # Get the length of the variable
-            length = variable.length
-            # Get the set of possible words for the variable
-            words = self.domains[variable]
-            # Create a new set to store the consistent words
-            consistent_words = set()
-            # Loop through each word in the original set
-            for word in words:
-                # Check if the word has the same length as the variable
-                if len(word) == length:
-                    # Add the word to the new set
-                    consistent_words.add(word)
-            # Update the domain of the variable with the new set
-            self.domains[variable] = consistent_words
+        for variable in self.variables:
+            # Keep the words of the variable's length, looked up in the
+            # vocabulary index rather than scanning the whole domain
+            words = self.crossword.index.words(variable.length)
+            self.domains[variable.id] = self.domains[variable.id].intersection(words)
 
     def revise(self, x, y):
         """
-        Make variable `x` arc consistent with variable `y`.
+        Make variable `x` arc consistent with variable `y` (both ids).
         To do so, remove values from `self.domains[x]` for which there is no
         possible corresponding value for `y` in `self.domains[y]`.
 
+        A word of `x` is supported by any word of `y` with the same letter at
+        their crossing, so one supporting word is kept per arc and letter
+        (its residual support). Supports still in `y`'s domain are reused,
+        and all of them are looked up again in one pass over it when one is
+        lost.
+
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
         # Get the overlap between x and y
-        overlap = self.crossword.overlaps[x, y]
+        overlap = self.overlaps[x].get(y)
         # If there is no overlap, return False
         if overlap is None:
             return False
         # Get the index of the overlapping letter for x and y
         i, j = overlap
-        # Get the set of possible words for x and y
         words_x = self.domains[x]
         words_y = self.domains[y]
-        # Create a new set to store the revised words for x
-        revised_words_x = set()
-        # Create a flag to indicate if a revision was made
-        revised = False
-        # Loop through each word in the original set for x
-        for word_x in words_x:
-            # Get the overlapping letter for x
-            letter_x = word_x[i]
-            # Create a flag to indicate if there is a consistent word for y
-            consistent = False
-            # Loop through each word in the set for y
-            for word_y in words_y:
-                # Get the overlapping letter for y
-                letter_y = word_y[j]
-                # Check if the letters match
-                if letter_x == letter_y:
-                    # Set the flag to True and break the loop
-                    consistent = True
-                    break
-            # If there is a consistent word for y, add the word for x to the new set
-            if consistent:
-                revised_words_x.add(word_x)
-            # Otherwise, set the revision flag to True
-            else:
-                revised = True
-        # Update the domain of x with the new set
-        self.domains[x] = revised_words_x
-        # Return the revision flag
-        return revised
+        residues = self.residues.get((x, y))
+        if residues is None:
+            residues = self.residues[x, y] = dict()
+
+        unsupported = set()
+        refreshed = False
+        for letter in {word[i] for word in words_x}:
+            support = residues.get(letter)
+            if support is None or support not in words_y:
+                if not refreshed:
+                    residues.clear()
+                    residues.update((word[j], word) for word in words_y)
+                    refreshed = True
+                if letter not in residues:
+                    unsupported.add(letter)
+        if not unsupported:
+            return False
+        self.domains[x] = {word for word in words_x if word[i] not in unsupported}
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -170,180 +397,357 @@ class CrosswordCreator():
         If `arcs` is None, begin with initial list of all arcs in the problem.
         Otherwise, use `arcs` as the initial list of arcs to make consistent.
 
+        Arcs are processed first in, first out, each at most once in the
+        worklist at a time; arcs into small domains come first, as revising
+        them is cheaper and more likely to empty a domain early.
+
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
         # If arcs is None, initialize it with all the arcs in the problem
         if arcs is None:
-            arcs = []
-            # Loop through each variable
-            for x in self.crossword.variables:
-                # Loop through each neighbor of x
-                for y in self.crossword.neighbors(x):
-                    # Add the arc (x, y) to the list
-                    arcs.append((x, y))
-        # Loop until there are no more arcs to process
-        while arcs:
-            # Pop an arc from the list
-            x, y = arcs.pop()
+            arcs = self.arcs_into(range(len(self.variables)))
+        arcs = sorted(set(arcs), key=lambda arc: (len(self.domains[arc[0]]), arc))
+        queue = deque(arcs)
+        queued = set(arcs)
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            x, y = arc
             # Try to revise the domain of x with respect to y
             if self.revise(x, y):
                 # If x's domain is empty, return False
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
                     return False
-                # Otherwise, add all the arcs (z, x) to the list, where z is a neighbor of x other than y
-                for z in self.crossword.neighbors(x) - {y}:
-                    arcs.append((z, x))
+                # Otherwise, revisit the arcs (z, x) for every other neighbor z of x
+                added = [
+                    (z, x) for z, _, _ in self.crossings[x]
+                    if z != y and (z, x) not in queued
+                ]
+                added.sort(key=lambda arc: (len(self.domains[arc[0]]), arc))
+                queue.extend(added)
+                queued.update(added)
         # Return True if all domains are consistent
         return True
 
-
-    def assignment_complete(self, assignment):
+    def assignment_complete(self, values, variables=None):
         """
-        Return True if `assignment` is complete (i.e., assigns a value to each
-        crossword variable); return False otherwise.
+        Return True if `values` (words indexed by variable id, None when
+        unassigned) assigns a value to each crossword variable, or to each
+        of `variables` if given; return False otherwise.
         """
-        # Check if every variable in the crossword has a value assigned in the assignment
-        return all(variable in assignment for variable in self.crossword.variables)
-
+        if variables is None:
+            return all(word is not None for word in values)
+        return all(values[var] is not None for var in variables)
 
     def consistent(self, assignment):
         """
-        Return True if `assignment` is consistent (i.e., words fit in crossword
-        puzzle without conflicting characters); return False otherwise.
+        Return True if `assignment` (a mapping of variables to words) is
+        consistent (i.e., words fit in crossword puzzle without conflicting
+        characters); return False otherwise.
         """
         # Check if every value in the assignment is distinct
         if len(set(assignment.values())) != len(assignment):
             return False
-        # Loop through each variable and value in the assignment
-        for variable, value in assignment.items():
-            # Check if the value has the same length as the variable
-            if len(value) != variable.length:
+        values = self.to_values(assignment)
+        return all(
+            word is None or self.value_consistent(var, word, values)
+            for var, word in enumerate(values)
+        )
+
+    def value_consistent(self, var, value, values):
+        """
+        Return True if `value` fits variable `var` given the words of the
+        crossing variables in `values`. Distinctness is checked by `search`.
+        """
+        if len(value) != self.variables[var].length:
+            return False
+        for other, i, j in self.crossings[var]:
+            word = values[other]
+            if word is not None and value[i] != word[j]:
                 return False
-            # Loop through each neighbor of the variable
-            for neighbor in self.crossword.neighbors(variable):
-                # If the neighbor is also assigned a value
-                if neighbor in assignment:
-                    # Get the overlap between the variable and the neighbor
-                    i, j = self.crossword.overlaps[variable, neighbor]
-                    # Check if the overlapping letters are different
-                    if value[i] != assignment[neighbor][j]:
-                        return False
-        # Return True if all constraints are satisfied
         return True
 
-
-    def order_domain_values(self, var, assignment):
+    def order_domain_values(self, var, values):
         """
         Return a list of values in the domain of `var`, in order by
         the number of values they rule out for neighboring variables.
         The first value in the list, for example, should be the one that rules out the fewest values among the neighbors of `var`.
         """
-        # Create a dictionary to store the number of values ruled out for each value in var's domain
-        n_values = dict()
-        # Loop through each value in var's domain
-        for value in self.domains[var]:
-            # Initialize the counter to zero
-            n_values[value] = 0
-            # Loop through each neighbor of var that is not assigned a value yet
-            for neighbor in self.crossword.neighbors(var) - assignment.keys():
-                # Get the overlap between var and neighbor
-                i, j = self.crossword.overlaps[var, neighbor]
-                # Loop through each value in neighbor's domain
-                for value2 in self.domains[neighbor]:
-                    # If the overlapping letters are different, increment the counter by one
-                    if value[i] != value2[j]:
-                        n_values[value] += 1
+        # Visit values in a seeded random order so ties are broken reproducibly
+        candidates = sorted(self.domains[var])
+        self.rng.shuffle(candidates)
+        # Count the letters of each unassigned neighbor's words at the
+        # crossing: a value rules out the neighbor's words with another letter
+        crossing = [
+            (i, len(self.domains[neighbor]), Counter(word[j] for word in self.domains[neighbor]))
+            for neighbor, i, j in self.crossings[var]
+            if values[neighbor] is None
+        ]
+        n_values = {
+            value: sum(size - letters[value[i]] for i, size, letters in crossing)
+            for value in candidates
+        }
         # Sort the values by the number of values ruled out in ascending order and return them as a list
-        return sorted(n_values.keys(), key=lambda x: n_values[x])
-
-
-    def select_unassigned_variable(self, assignment):
-        """
-        Return an unassigned variable not already part of `assignment`.
-        Choose the variable with the minimum number of remaining values
-        in its domain. If there is a tie, choose the variable with the highest degree.
-        If there is a tie, any of the tied variables are acceptable return values.
-        """
-        # Create a list to store the unassigned variables
-        unassigned = []
-        # Loop through each variable in the crossword
-        for variable in self.crossword.variables:
-            # If the variable is not assigned a value yet, add it to the list
-            if variable not in assignment:
-                unassigned.append(variable)
-                # Create a dictionary to store the number of remaining values and degree for each unassigned variable
-                info = dict()
-                # Loop through each unassigned variable
-                for variable in unassigned:
-                    # Get the number of remaining values in its domain
-                    n_values = len(self.domains[variable])
-                    # Get its degree (number of neighbors)
-                    degree = len(self.crossword.neighbors(variable))
-                    # Store them as a tuple in the dictionary
-                    info[variable] = (n_values, degree)
-               
-                # Sort the unassigned variables by their number of remaining values in ascending order
-                sorted_by_values = sorted(info.keys(), key=lambda x: info[x][0])
-                # Get the minimum number of remaining values
-                min_values = info[sorted_by_values[0]][0]
-                # Filter out any variables that have more than min_values remaining values
-                candidates = [variable for variable in sorted_by_values if info[variable][0] == min_values]
-                # If there is only one candidate left, return it
-                if len(candidates) == 1:
-                    return candidates[0]
-                # Otherwise, sort them by their degree in descending order
-                sorted_by_degree = sorted(candidates, key=lambda x: info[x][1], reverse=True)
-                # Return any of them (the first one by default)
-                return sorted_by_degree[0]
-
-    def backtrack(self, assignment):
-        """
-        Using Backtracking Search, take as input a partial assignment for the
-        crossword and return a complete assignment if possible to do so.
-
-        `assignment` is a mapping from variables (keys) to words (values).
-
-        If no assignment is possible, return None.
-        """
-        # Check if the assignment is complete
-        if self.assignment_complete(assignment):
-            # Return the assignment as a solution
-            return assignment
-        # Select an unassigned variable
-        var = self.select_unassigned_variable(assignment)
-        # Loop through each value in the domain of the variable in order
-        for value in self.order_domain_values(var, assignment):
-            # Create a copy of the assignment
-            new_assignment = assignment.copy()
-            # Assign the value to the variable in the copy
-            new_assignment[var] = value
-            # Check if the new assignment is consistent
-            if self.consistent(new_assignment):
-                # Recursively try to extend the new assignment
-                result = self.backtrack(new_assignment)
-                # If a solution is found, return it
-                if result is not None:
-                    return result
-        # If no solution is found, return None
+        return sorted(candidates, key=lambda x: n_values[x])
+
+    def select_unassigned_variable(self, values, variables=None):
+        """
+        Return the id of a variable not already assigned in `values`: the
+        first one in (i, j, direction) order, among `variables` if given.
+        """
+        for var in range(len(values)) if variables is None else variables:
+            if values[var] is None:
+                return var
+
+    def search(self, values, variables=None, used=None):
+        """
+        Return `values` completed by backtracking search, or None.
+        Only `variables` are assigned if given, with words distinct from
+        each other, from those in `values` and from `used`.
+        """
+        assigned = [word for word in values if word is not None]
+        if len(set(assigned)) != len(assigned):
+            return None
+        if not self.backjumping:
+            return self.csp_search(values, variables, used)
+
+        # Learned nogoods depend on the domains, which change between searches
+        self.nogoods.clear()
+        owners = dict.fromkeys(used or ())
+        owners.update((word, var) for var, word in enumerate(values) if word is not None)
+        fixed = {var for var, word in enumerate(values) if word is not None}
+        result, _ = self.backjump(values, owners, fixed, variables)
+        return result
+
+    def csp_search(self, values, variables=None, used=None):
+        """
+        Complete `values` by search on the shared CSP engine, with forward
+        propagation of every assignment to the crossing entries, the most
+        constrained entry first and its least constraining words first.
+        Only `variables` are assigned if given; words in `used` are excluded.
+        """
+        scope = list(range(len(self.variables)) if variables is None else variables)
+        excluded = set(used or ())
+        excluded.update(word for word in values if word is not None)
+        csp, words, neighbors = self.build_csp(values, scope, excluded)
+        rng = self.rng
+
+        def order(csp, k):
+            # Visit words in a seeded random order so ties are broken reproducibly
+            candidates = sorted(csp.domains[k])
+            rng.shuffle(candidates)
+            # A word rules out the words of each unassigned crossing entry
+            # with another letter at the crossing
+            crossing = [
+                (i, len(csp.domains[other]), Counter(keys[value] for value in csp.domains[other]))
+                for other, i, keys in neighbors[k]
+                if len(csp.domains[other]) > 1
+            ]
+            ruled_out = {
+                value: sum(size - letters[words[value][i]] for i, size, letters in crossing)
+                for value in candidates
+            }
+            return sorted(candidates, key=ruled_out.__getitem__)
+
+        result = csp.solve(select=smallest_domain, order=order)
+        self.stats = csp.stats
+        if result is None:
+            return None
+        values = list(values)
+        for k, var in enumerate(scope):
+            values[var] = words[result[k]]
+        return values
+
+    def build_csp(self, values, scope, excluded):
+        """
+        Return the CSP of assigning the variables in `scope` (ids), keeping
+        their current word in `values` if any, without the `excluded` words.
+        One CSP variable stands for each entry of `scope`, in order; crossing
+        entries have equal letters, and all words differ.
+
+        Also return the list of words its integer values stand for, and for
+        each CSP variable its crossings as (other CSP variable, own index,
+        letters of the other's words by value).
+        """
+        words = sorted(set().union(
+            *(self.domains[var] for var in scope),
+            (values[var] for var in scope if values[var] is not None)
+        ))
+        ids = {word: k for k, word in enumerate(words)}
+        letters = dict()
+        for var in scope:
+            for _, i, _ in self.crossings[var]:
+                if i not in letters:
+                    letters[i] = [word[i] if i < len(word) else None for word in words]
+
+        csp = CSP()
+        position = {var: k for k, var in enumerate(scope)}
+        for var in scope:
+            if values[var] is not None:
+                csp.add_variable([ids[values[var]]])
+            else:
+                csp.add_variable(ids[word] for word in self.domains[var] if word not in excluded)
+        neighbors = [[] for _ in scope]
+        for var in scope:
+            for other, i, j in self.crossings[var]:
+                if other not in position:
+                    continue
+                neighbors[position[var]].append((position[other], i, letters[j]))
+                if var < other:
+                    csp.add_constraint(KeyEqual(
+                        position[var], position[other], letters[i], letters[j]
+                    ))
+        csp.add_constraint(AllDifferent(range(len(scope))))
+        return csp, words, neighbors
+
+    def culprits(self, var, value, values, owners):
+        """
+        Return the set of variables whose words rule out `value` for `var`:
+        the crossing variables with a different letter, and the variable
+        already using `value` (None if `value` is excluded from the search).
+        """
+        culprits = {
+            other for other, i, j in self.crossings[var]
+            if values[other] is not None and value[i] != values[other][j]
+        }
+        if value in owners:
+            culprits.add(owners[value])
+        return culprits
+
+    def backjump(self, values, owners, fixed, variables=None):
+        """
+        Search with conflict-directed backjumping, on `self.domains`.
+
+        Each variable collects the set of assigned variables that ruled out
+        its values (its conflict set). When all its values fail, the search
+        returns straight to the most recent variable of that set, skipping
+        the assignments in between, which cannot fix the failure. The
+        assignment of the set is also recorded as a nogood, so that the
+        same combination of words is pruned at once if it comes up again.
+
+        `owners` maps each word in use to its variable (None for excluded
+        words) and `fixed` is the set of variables assigned before the
+        search. Return (values, None) on success, or (None, conflict set).
+        """
+        if self.assignment_complete(values, variables):
+            return values, None
+        var = self.select_unassigned_variable(values, variables)
+        conflict = set()
+        for value in self.order_domain_values(var, values):
+            culprits = self.culprits(var, value, values, owners)
+            if not culprits:
+                culprits = self.nogoods.find(var, value, values)
+            if culprits is not None:
+                conflict |= culprits
+                continue
+
+            values[var] = value
+            owners[value] = var
+            result, child_conflict = self.backjump(values, owners, fixed, variables)
+            if result is not None:
+                return result, None
+            values[var] = None
+            del owners[value]
+            if var not in child_conflict:
+                # This variable is not to blame: jump back over it
+                return None, child_conflict
+            conflict |= child_conflict - {var}
+
+        conflict.discard(None)
+        self.nogoods.add(
+            (other, values[other]) for other in conflict if other not in fixed
+        )
+        return None, conflict
+
+
+class NogoodTable():
+
+    def __init__(self, limit=10000):
+        """
+        Create a table of at most `limit` nogoods, sets of (variable, word)
+        pairs that cannot all hold in a solution, evicting the least
+        recently used first.
+        """
+        self.limit = limit
+        self.table = OrderedDict()
+        # For each (variable, word) pair, the nogoods containing it
+        self.index = dict()
+
+    def __len__(self):
+        return len(self.table)
+
+    def clear(self):
+        self.table.clear()
+        self.index.clear()
+
+    def add(self, pairs):
+        nogood = frozenset(pairs)
+        if self.limit <= 0 or not nogood or nogood in self.table:
+            return
+        self.table[nogood] = None
+        for pair in nogood:
+            self.index.setdefault(pair, set()).add(nogood)
+        if len(self.table) > self.limit:
+            evicted, _ = self.table.popitem(last=False)
+            for pair in evicted:
+                self.index[pair].discard(evicted)
+
+    def find(self, var, value, values):
+        """
+        Return the other variables of a nogood that assigning `value` to
+        `var` would complete, given the words in `values`, or None.
+        """
+        for nogood in self.index.get((var, value), ()):
+            if all(other == var or values[other] == word for other, word in nogood):
+                self.table.move_to_end(nogood)
+                return {other for other, _ in nogood if other != var}
+        return None
+
+
+def solve_component(creator, values, component, k, taken=()):
+    """
+    Return the words of the variables of `component` (ids, the `k`th
+    component) completing `values`, as a mapping of id to word, or None.
+    Words in `taken` are excluded. Module level so that it can run on a
+    worker process.
+    """
+    rng = creator.rng
+    creator.rng = creator.component_rng(k)
+    try:
+        result = creator.search(list(values), component, taken)
+    finally:
+        creator.rng = rng
+    if result is None:
         return None
+    return {var: result[var] for var in component}
 
 
 def main():
 
     # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+    if len(sys.argv) not in [3, 4, 5, 6]:
+        sys.exit("Usage: python generate.py structure words [output] [seed] [cache]")
 
     # Parse command-line arguments
     structure = sys.argv[1]
     words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    output = sys.argv[3] if len(sys.argv) >= 4 else None
+    seed = parse_seed(sys.argv[4] if len(sys.argv) >= 5 else None)
+    cache = None
+    if len(sys.argv) == 6:
+        from puzzleskdp.solve_cache import ResultCache
+        cache = ResultCache(sys.argv[5])
 
     # Generate crossword
     crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    creator = CrosswordCreator(crossword, seed, cache=cache)
+    try:
+        assignment = creator.solve()
+    finally:
+        if cache is not None:
+            cache.close()
+    print(f"Seed: {seed}")
 
     # Print result
     if assignment is None:
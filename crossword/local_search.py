@@ -0,0 +1,154 @@
+import math
+import os
+import random
+import sys
+from collections import Counter, deque
+
+import numpy as np
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.seeding import make_rng
+
+
+class LocalSearchFiller():
+
+    def __init__(self, crossword, seed=None, max_steps=50000, noise=0.1,
+                 temperature=0.5, cooling=0.9995, tabu=10):
+        """
+        Create a stochastic filler for `crossword`.
+
+        Starting from random words of the right lengths, it repeatedly picks
+        an entry in conflict with a crossing entry and replaces its word with
+        one that conflicts with the fewest crossing letters (min-conflicts).
+        A recently replaced word may not come back to its entry for `tabu`
+        steps, and with probability `noise` the replacement is instead a
+        random word, kept according to a simulated annealing schedule
+        starting at `temperature`. Gives up after `max_steps` replacements.
+        """
+        self.crossword = crossword
+        self.seed = seed
+        self.rng = random.Random() if seed is None else make_rng(seed)
+        self.max_steps = max_steps
+        self.noise = noise
+        self.temperature = temperature
+        self.cooling = cooling
+        self.tabu = tabu
+        self.index = crossword.index
+        self.variables = self.crossword.ordered
+        # For each variable, its crossings as (neighbor, own index, neighbor index)
+        self.crossings = {
+            var: [
+                (self.variables[other], i, j)
+                for other, i, j in self.crossword.crossings[var.id]
+            ]
+            for var in self.variables
+        }
+
+    def pattern(self, var, assignment):
+        """
+        Return the pattern of `var` given the letters of its crossing entries.
+        """
+        letters = ["?"] * var.length
+        for other, i, j in self.crossings[var]:
+            if other in assignment:
+                letters[i] = assignment[other][j]
+        return "".join(letters)
+
+    def conflicts(self, var, word, assignment, used):
+        """
+        Return the number of crossing letters `word` would conflict with in
+        `var`, counting a word already used by another entry as one more.
+        """
+        count = sum(
+            1 for other, i, j in self.crossings[var]
+            if word[i] != assignment[other][j]
+        )
+        if used[word] > (assignment[var] == word):
+            count += 1
+        return count
+
+    def conflicted(self, assignment, used):
+        return [
+            var for var in self.variables
+            if self.conflicts(var, assignment[var], assignment, used)
+        ]
+
+    def best_words(self, var, assignment, used, tabu):
+        """
+        Return the non-tabu words of `var`'s length with the fewest
+        conflicts, and that number of conflicts.
+        """
+        pattern = self.pattern(var, assignment)
+        constrained = var.length - pattern.count("?")
+        words = self.index.words(var.length)
+        counts = self.index.letter_counts(pattern)
+        best, fewest = [], None
+        # Visit words by decreasing number of matching letters, stopping
+        # once they cannot beat the best words found
+        for count in np.unique(counts)[::-1]:
+            if fewest is not None and constrained - count > fewest:
+                break
+            for k in np.flatnonzero(counts == count):
+                word = words[k]
+                if (var, word) in tabu or word == assignment[var]:
+                    continue
+                conflicts = constrained - count + (used[word] > 0)
+                if fewest is None or conflicts < fewest:
+                    best, fewest = [word], conflicts
+                elif conflicts == fewest:
+                    best.append(word)
+        return best, fewest
+
+    def fill(self, pinned=None):
+        """
+        Return a complete, conflict-free assignment of words to variables,
+        with `pinned` variables fixed to their words, or None if none was
+        found within the step budget.
+        Raise ValueError if a pinned word does not fit its variable.
+        """
+        pinned = self.crossword.check_pins(pinned or dict())
+        for var in self.variables:
+            if var not in pinned and not self.index.words(var.length):
+                return None
+
+        assignment = dict(pinned)
+        for var in self.variables:
+            if var not in assignment:
+                assignment[var] = self.rng.choice(self.index.words(var.length))
+        used = Counter(assignment.values())
+
+        tabu_order = deque()
+        tabu = set()
+        temperature = self.temperature
+        for _ in range(self.max_steps):
+            candidates = [var for var in self.conflicted(assignment, used) if var not in pinned]
+            if not candidates:
+                if self.conflicted(assignment, used):
+                    return None
+                return assignment
+
+            var = self.rng.choice(candidates)
+            current = self.conflicts(var, assignment[var], assignment, used)
+            if self.rng.random() < self.noise:
+                word = self.rng.choice(self.index.words(var.length))
+                delta = self.conflicts(var, word, assignment, used) - current
+                if delta > 0 and self.rng.random() >= math.exp(-delta / max(temperature, 1e-9)):
+                    continue
+            else:
+                words, _ = self.best_words(var, assignment, used, tabu)
+                if not words:
+                    continue
+                word = self.rng.choice(words)
+            temperature *= self.cooling
+
+            # The replaced word may not come back to this entry for a while
+            tabu_order.append((var, assignment[var]))
+            tabu.add((var, assignment[var]))
+            if len(tabu_order) > self.tabu:
+                tabu.discard(tabu_order.popleft())
+
+            used[assignment[var]] -= 1
+            assignment[var] = word
+            used[word] += 1
+
+        return None
@@ -0,0 +1,99 @@
+import numpy as np
+
+
+WILDCARD = "?"
+
+# Number of set bits of each byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class WordIndex():
+
+    def __init__(self, words):
+        """
+        Index `words` for wildcard queries such as `match("?A??E")`.
+
+        Words are grouped by length and sorted. For every length, position
+        and letter, a packed bitmap marks the words having that letter at that
+        position, so a query is the AND of one bitmap per fixed letter and a
+        count is a popcount of the result, whatever the size of the list.
+        """
+        self.lengths = dict()
+        self.bitmaps = dict()
+        by_length = dict()
+        for word in words:
+            if not word:
+                continue
+            by_length.setdefault(len(word), []).append(word)
+
+        for length, group in by_length.items():
+            group.sort()
+            self.lengths[length] = group
+            # One row of code points per word
+            codes = np.array(group, dtype=f"<U{length}").view(np.uint32).reshape(len(group), length)
+            for k in range(length):
+                column = codes[:, k]
+                for code in np.unique(column):
+                    self.bitmaps[length, k, chr(code)] = np.packbits(column == code, bitorder="little")
+
+    def __len__(self):
+        return sum(len(group) for group in self.lengths.values())
+
+    def __contains__(self, word):
+        return WILDCARD not in word and self.count(word) > 0
+
+    def words(self, length):
+        """Return the sorted list of words of `length` letters."""
+        return self.lengths.get(length, [])
+
+    def bitmap(self, pattern):
+        """
+        Return the packed bitmap of the words matching `pattern`, over
+        `words(len(pattern))`, or None if the pattern has no fixed letter.
+        """
+        length = len(pattern)
+        result = None
+        for k, letter in enumerate(pattern):
+            if letter == WILDCARD:
+                continue
+            bits = self.bitmaps.get((length, k, letter))
+            if bits is None:
+                return np.zeros((len(self.words(length)) + 7) // 8, dtype=np.uint8)
+            result = bits.copy() if result is None else np.bitwise_and(result, bits, out=result)
+        return result
+
+    def indices(self, pattern):
+        """Return the indices in `words(len(pattern))` of the words matching `pattern`."""
+        words = self.words(len(pattern))
+        bits = self.bitmap(pattern)
+        if bits is None:
+            return np.arange(len(words))
+        return np.flatnonzero(np.unpackbits(bits, count=len(words), bitorder="little"))
+
+    def match(self, pattern):
+        """
+        Return the sorted list of words matching `pattern`, where "?"
+        stands for any letter.
+        """
+        words = self.words(len(pattern))
+        return [words[i] for i in self.indices(pattern)]
+
+    def count(self, pattern):
+        """Return the number of words matching `pattern` without listing them."""
+        bits = self.bitmap(pattern)
+        if bits is None:
+            return len(self.words(len(pattern)))
+        return int(POPCOUNT[bits].sum(dtype=np.int64))
+
+    def letter_counts(self, pattern):
+        """
+        Return, for every word of the length of `pattern`, the number of
+        fixed letters of `pattern` it has in the same position.
+        """
+        length = len(pattern)
+        counts = np.zeros(len(self.words(length)), dtype=np.int32)
+        for k, letter in enumerate(pattern):
+            bits = self.bitmaps.get((length, k, letter)) if letter != WILDCARD else None
+            if bits is not None:
+                counts += np.unpackbits(bits, count=len(counts), bitorder="little")
+        return counts
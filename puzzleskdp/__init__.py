@@ -0,0 +1,4 @@
+"""
+Shared utilities for the puzzle generators in `crossword`, `sudoku` and
+`wordsearch`.
+"""
@@ -0,0 +1,4 @@
+from puzzleskdp.cli import main
+
+
+main()
@@ -0,0 +1,437 @@
+"""
+Assemble generated puzzles into a print-ready PDF book.
+
+Puzzles are generated in worker processes and streamed, in order, into a
+vector PDF one page at a time, so memory stays flat however long the book is.
+Solutions are collected as plain grids and laid out after the puzzles.
+
+Usage:
+    python -m puzzleskdp.book book.pdf --sudoku medium 50 \\
+        --word-search 15 20 words.txt 30 --crossword structure.txt words.txt 10
+"""
+import argparse
+
+from puzzleskdp.generators import generator, load
+from puzzleskdp.seeding import derive_seed, make_rng, new_seed, parse_seed
+
+
+# Trim sizes in inches
+PAGE_SIZES = {
+    "letter": (8.5, 11),
+    "a4": (8.27, 11.69),
+    "8x10": (8, 10),
+    "6x9": (6, 9),
+}
+
+SOLUTIONS_PER_PAGE = 4
+
+
+class BookPuzzle():
+
+    def __init__(self, kind, title, grid, solution, seed, words=None,
+                 box=None, numbers=None, highlights=None, difficulty=None):
+        """
+        A puzzle ready to be laid out.
+
+        `grid` and `solution` are lists of rows of cell text, where None marks
+        a blocked cell. `words` is an optional word list printed under the
+        grid, `box` the size of Sudoku boxes, `numbers` a mapping of cells to
+        clue numbers, `highlights` the cells shaded in the solution and
+        `difficulty` the level of a Sudoku.
+        """
+        self.kind = kind
+        self.title = title
+        self.grid = grid
+        self.solution = solution
+        self.seed = seed
+        self.words = words or []
+        self.box = box
+        self.numbers = numbers or {}
+        self.highlights = highlights or set()
+        self.difficulty = difficulty
+
+
+# Per-process caches of parsed inputs, reused by every puzzle of a worker
+_vocabularies = {}
+_candidates = {}
+_crosswords = {}
+_caches = {}
+_indexes = {}
+
+
+def load_vocabulary(words_file):
+    """Return the upper-cased lines of `words_file`, read once per process."""
+    if words_file not in _vocabularies:
+        with open(words_file) as f:
+            _vocabularies[words_file] = f.read().upper().splitlines()
+    return _vocabularies[words_file]
+
+
+def load_candidates(words_file, size):
+    """Return the words of `words_file` fitting a `size` grid, filtered once per process."""
+    key = (words_file, size)
+    if key not in _candidates:
+        sampler = load("wordsearch", "word_search_sampler")
+        _candidates[key] = list(sampler.candidates(load_vocabulary(words_file), size))
+    return _candidates[key]
+
+
+def load_crossword(structure_file, words_file):
+    """Return the parsed `Crossword` for a structure and vocabulary, built once per process."""
+    key = (structure_file, words_file)
+    if key not in _crosswords:
+        _crosswords[key] = generator("crossword").Crossword(structure_file, words_file)
+    return _crosswords[key]
+
+
+def make_sudoku(seed, difficulty):
+    sudoku = generator("sudoku")
+    puzzle = sudoku.generate_puzzle(difficulty, seed)
+    return BookPuzzle(
+        "sudoku", f"Sudoku ({difficulty})",
+        [[str(v) if v else "" for v in row] for row in puzzle.incomplete_puzzle.tolist()],
+        [[str(v) for v in row] for row in puzzle.solved_puzzle.tolist()],
+        seed, box=puzzle.solved_puzzle.box, difficulty=difficulty
+    )
+
+
+def make_word_search(seed, size, words_num, words_file, all_directions=False):
+    word_search = generator("wordsearch")
+    placement = load("wordsearch", "word_search_placement")
+    rng = make_rng(seed)
+    sampler = load("wordsearch", "word_search_sampler")
+    words = sampler.sample_loaded(load_candidates(words_file, size), words_num, rng)
+    directions = placement.ALL_DIRECTIONS if all_directions else placement.DIRECTIONS
+    grid, word_positions = word_search.generate_word_search(words, size, rng, directions)
+    return BookPuzzle(
+        "wordsearch", "Word Search", grid, grid, seed,
+        words=sorted(set(word_positions.values())),
+        highlights=set(word_positions)
+    )
+
+
+def load_cache(path):
+    """Return the solve result cache at `path`, opened once per process."""
+    if path not in _caches:
+        from puzzleskdp.solve_cache import ResultCache
+        _caches[path] = ResultCache(path)
+    return _caches[path]
+
+
+def make_crossword(seed, structure_file, words_file, cache=None):
+    generate = generator("crossword")
+    parsed = load_crossword(structure_file, words_file)
+    creator = generate.CrosswordCreator(parsed, seed, cache=load_cache(cache) if cache else None)
+    assignment = creator.solve()
+    if assignment is None:
+        return None
+    letters = creator.letter_grid(assignment)
+
+    # Number the cells where a word starts, in reading order
+    starts = sorted({(v.i, v.j) for v in parsed.variables})
+    numbers = {cell: n for n, cell in enumerate(starts, 1)}
+    structure = parsed.structure
+    return BookPuzzle(
+        "crossword", "Fill-In",
+        [["" if structure[i][j] else None for j in range(parsed.width)]
+         for i in range(parsed.height)],
+        [[letters[i][j] if structure[i][j] else None for j in range(parsed.width)]
+         for i in range(parsed.height)],
+        seed,
+        words=sorted(assignment.values(), key=lambda word: (len(word), word)),
+        numbers=numbers
+    )
+
+
+def load_index(path):
+    """Return the fingerprint index at `path`, opened once per process."""
+    if path not in _indexes:
+        from puzzleskdp.dedup import FingerprintIndex
+        _indexes[path] = FingerprintIndex(path)
+    return _indexes[path]
+
+
+def puzzle_fingerprint(puzzle):
+    """Return the `puzzleskdp.dedup` fingerprint of a `BookPuzzle`."""
+    from puzzleskdp import dedup
+    if puzzle.kind == "sudoku":
+        return dedup.sudoku_fingerprint([[int(v or 0) for v in row] for row in puzzle.grid])
+    if puzzle.kind == "crossword":
+        return dedup.crossword_fingerprint(puzzle.words)
+    return dedup.word_search_fingerprint(puzzle.grid, puzzle.words, puzzle.highlights)
+
+
+def make_unique(index, function, seed, *args, max_attempts=100):
+    """
+    Generate a puzzle with `function(seed, *args)` that is not already in the
+    fingerprint index at `index`, and record it. Retries use seeds derived
+    from `seed`; return None if no new puzzle was found.
+    """
+    for attempt in range(max_attempts):
+        attempt_seed = seed if attempt == 0 else derive_seed(seed, "retry", attempt)
+        puzzle = function(attempt_seed, *args)
+        if puzzle is None:
+            return None
+        if load_index(index).add(puzzle_fingerprint(puzzle)):
+            return puzzle
+    return None
+
+
+def request_task(request):
+    """
+    Return the (function, args) generation task for a request, a dictionary
+    such as `{"type": "sudoku", "difficulty": "easy", "seed": 1}`.
+    A random seed is used if the request has none.
+    Raise ValueError if the request is malformed.
+    """
+    try:
+        kind = request["type"]
+        seed = int(request.get("seed", new_seed()))
+        if kind == "sudoku":
+            return make_sudoku, (seed, request.get("difficulty", "easy"))
+        if kind == "wordsearch":
+            return make_word_search, (
+                seed, int(request["size"]), int(request["words_num"]),
+                request["words_file"], bool(request.get("all_directions", False))
+            )
+        if kind == "crossword":
+            return make_crossword, (seed, request["structure"], request["words"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"invalid request: {e!r}")
+    raise ValueError(f"unknown puzzle type {kind!r}")
+
+
+def puzzle_to_dict(puzzle):
+    """Return a JSON-serializable description of a `BookPuzzle`."""
+    return {
+        "type": puzzle.kind,
+        "title": puzzle.title,
+        "seed": puzzle.seed,
+        "grid": puzzle.grid,
+        "solution": puzzle.solution,
+        "words": puzzle.words,
+        "numbers": [[i, j, n] for (i, j), n in sorted(puzzle.numbers.items())],
+        "highlights": sorted(puzzle.highlights),
+    }
+
+
+def run_task(task):
+    function, args = task
+    return function(*args)
+
+
+def generate(tasks, workers=None):
+    """
+    Yield the puzzles for `tasks`, a list of (function, args) pairs, in order.
+    With more than one worker the puzzles are generated by a process pool,
+    and consumed as they complete rather than all at once.
+    """
+    if workers == 1:
+        yield from map(run_task, tasks)
+        return
+    import multiprocessing
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(run_task, tasks, chunksize=4)
+
+
+def book_tasks(seed, sudoku=(), word_search=(), crossword=(), index=None):
+    """
+    Return the generation tasks for a book.
+
+    Each section is a list of argument tuples ending with a puzzle count, e.g.
+    `sudoku=[("easy", 20)]`. Puzzle i of a section gets a seed derived from
+    `seed`, the section type and its index, so the book is the same whatever
+    the number of workers. With `index`, the path of a fingerprint index,
+    puzzles already recorded there are regenerated (see `make_unique`); when
+    two puzzles of one run collide, the one generated first keeps its seed,
+    so with several workers the book may then depend on their timing.
+    """
+    tasks = []
+    sections = [
+        ("sudoku", make_sudoku, sudoku),
+        ("wordsearch", make_word_search, word_search),
+        ("crossword", make_crossword, crossword),
+    ]
+    for kind, function, specs in sections:
+        for number, spec in enumerate(specs):
+            *args, count = spec
+            for i in range(int(count)):
+                task_seed = derive_seed(seed, kind, number, i)
+                if index is None:
+                    tasks.append((function, (task_seed, *args)))
+                else:
+                    tasks.append((make_unique, (index, function, task_seed, *args)))
+    return tasks
+
+
+def draw_grid(ax, grid, box=None, numbers=None, highlights=()):
+    """Draw a grid of cell text on a matplotlib axes, one unit per cell."""
+    from matplotlib.patches import Rectangle
+
+    rows, columns = len(grid), len(grid[0])
+    ax.set_xlim(0, columns)
+    ax.set_ylim(rows, 0)
+    ax.set_aspect("equal")
+    ax.axis("off")
+
+    # Scale text to the size of a cell on the page
+    width = ax.get_position().width * ax.figure.get_figwidth()
+    cell = min(width / columns, ax.get_position().height * ax.figure.get_figheight() / rows) * 72
+    for i, row in enumerate(grid):
+        for j, text in enumerate(row):
+            if text is None:
+                color = "black"
+            elif (i, j) in highlights:
+                color = "#d9d9d9"
+            else:
+                color = "white"
+            ax.add_patch(Rectangle((j, i), 1, 1, linewidth=0.5, edgecolor="black", facecolor=color))
+            if text:
+                ax.text(j + 0.5, i + 0.55, text, fontsize=cell * 0.55, ha="center", va="center")
+            if numbers and (i, j) in numbers:
+                ax.text(j + 0.06, i + 0.08, str(numbers[i, j]), fontsize=cell * 0.22, ha="left", va="top")
+
+    if box:
+        for k in range(0, rows + 1, box):
+            ax.plot([0, columns], [k, k], color="black", linewidth=2)
+        for k in range(0, columns + 1, box):
+            ax.plot([k, k], [0, rows], color="black", linewidth=2)
+
+
+def _page(page_size, page_number):
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=page_size)
+    fig.text(0.5, 0.03, str(page_number), ha="center", va="bottom", fontsize=10)
+    return fig
+
+
+def _grid_axes(fig, left, bottom, width, height, grid):
+    """Add axes with the aspect ratio of `grid`, centered in the given box."""
+    fig_width, fig_height = fig.get_size_inches()
+    rows, columns = len(grid), len(grid[0])
+    cell = min(width * fig_width / columns, height * fig_height / rows)
+    w, h = cell * columns / fig_width, cell * rows / fig_height
+    return fig.add_axes([left + (width - w) / 2, bottom + (height - h) / 2, w, h])
+
+
+def render_puzzle_page(pdf, puzzle, number, page_number, page_size):
+    import matplotlib.pyplot as plt
+
+    fig = _page(page_size, page_number)
+    fig.text(0.5, 0.94, f"{number}. {puzzle.title}", ha="center", va="top", fontsize=16)
+    grid_bottom = 0.35 if puzzle.words else 0.1
+    ax = _grid_axes(fig, 0.08, grid_bottom, 0.84, 0.88 - grid_bottom, puzzle.grid)
+    draw_grid(ax, puzzle.grid, puzzle.box, puzzle.numbers)
+
+    if puzzle.words:
+        columns = 4
+        per_column = -(-len(puzzle.words) // columns)
+        for c in range(columns):
+            column = puzzle.words[c * per_column:(c + 1) * per_column]
+            fig.text(0.1 + c * 0.21, 0.31, "\n".join(column), ha="left", va="top",
+                     fontsize=9, linespacing=1.4)
+
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def render_solutions_page(pdf, solutions, page_number, page_size):
+    """Draw a page of (number, solution grid, box, highlights) solutions."""
+    import matplotlib.pyplot as plt
+
+    fig = _page(page_size, page_number)
+    fig.text(0.5, 0.96, "Solutions", ha="center", va="top", fontsize=14)
+    for k, (number, solution, box_size, highlights) in enumerate(solutions):
+        left = 0.06 + (k % 2) * 0.46
+        bottom = 0.5 - (k // 2) * 0.43
+        ax = _grid_axes(fig, left, bottom, 0.42, 0.4, solution)
+        box = ax.get_position()
+        fig.text(box.x0 + box.width / 2, box.y1 + 0.005, str(number), ha="center", va="bottom", fontsize=10)
+        draw_grid(ax, solution, box_size, highlights=highlights)
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def build_book(output, tasks, page_size=PAGE_SIZES["letter"], workers=None, title=None):
+    """
+    Generate the puzzles of `tasks` and lay them out in a PDF at `output`:
+    one puzzle per numbered page, then the solutions, four per page.
+    Puzzles that could not be generated are left out.
+    Return the number of pages written.
+    """
+    return render_book(output, generate(tasks, workers), page_size, title)
+
+
+def render_book(output, puzzles, page_size=PAGE_SIZES["letter"], title=None):
+    """Lay out an iterable of puzzles in a PDF at `output`, skipping None; return the page count."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    solutions = []
+    page_number = 0
+    # Embed TrueType fonts, as required for print
+    with matplotlib.rc_context({"pdf.fonttype": 42}), PdfPages(output) as pdf:
+        if title:
+            pdf.infodict()["Title"] = title
+        for puzzle in puzzles:
+            if puzzle is None:
+                continue
+            page_number += 1
+            render_puzzle_page(pdf, puzzle, len(solutions) + 1, page_number, page_size)
+            # Keep only what the solutions pages draw, not the whole puzzle
+            solutions.append((len(solutions) + 1, puzzle.solution, puzzle.box, puzzle.highlights))
+
+        for k in range(0, len(solutions), SOLUTIONS_PER_PAGE):
+            page_number += 1
+            render_solutions_page(pdf, solutions[k:k + SOLUTIONS_PER_PAGE], page_number, page_size)
+
+    return page_number
+
+
+def add_arguments(parser):
+    parser.add_argument("output", help="path of the PDF to write")
+    parser.add_argument("--sudoku", nargs=2, action="append", default=[],
+                        metavar=("DIFFICULTY", "COUNT"))
+    parser.add_argument("--word-search", nargs=4, action="append", default=[],
+                        metavar=("SIZE", "WORDS_NUM", "WORDS_FILE", "COUNT"))
+    parser.add_argument("--crossword", nargs=3, action="append", default=[],
+                        metavar=("STRUCTURE", "WORDS", "COUNT"))
+    parser.add_argument("--seed", help="seed of the whole book (random if omitted)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--page-size", choices=sorted(PAGE_SIZES), default="letter")
+    parser.add_argument("--from-catalog", metavar="CATALOG",
+                        help="lay out puzzles of a catalog instead of generating them")
+    parser.add_argument("--ids", help="catalog ids to lay out, e.g. 0:50 (all if omitted)")
+    parser.add_argument("--index", help="fingerprint index used to reject duplicate puzzles")
+    parser.add_argument("--solve-cache", metavar="PATH",
+                        help="reuse crossword fills of earlier builds with the same inputs and seed")
+
+
+def run(args):
+    if args.from_catalog:
+        from puzzleskdp.catalog import Catalog, parse_ids
+        with Catalog(args.from_catalog) as catalog:
+            puzzles = (catalog[id] for id in parse_ids(args.ids, len(catalog)))
+            pages = render_book(args.output, puzzles, PAGE_SIZES[args.page_size])
+        print(f"Wrote {pages} pages to {args.output} from {args.from_catalog}.")
+        return
+    seed = parse_seed(args.seed)
+    word_search = [(int(size), int(n), path, count) for size, n, path, count in args.word_search]
+    crossword = args.crossword
+    if args.solve_cache:
+        crossword = [(structure, words, args.solve_cache, count) for structure, words, count in crossword]
+    tasks = book_tasks(seed, args.sudoku, word_search, crossword, args.index)
+    pages = build_book(args.output, tasks, PAGE_SIZES[args.page_size], args.workers)
+    print(f"Wrote {pages} pages to {args.output} (seed {seed}).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assemble a puzzle book PDF.")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
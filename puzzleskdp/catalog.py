@@ -0,0 +1,388 @@
+"""
+Compact binary catalog of generated puzzles.
+
+A catalog is two append-only files: `PATH`, holding one record per puzzle,
+and `PATH.idx`, holding the 8-byte offset of each record, so puzzle `id` is
+found with one lookup. Records are written under an exclusive lock on the
+data file, so several processes may append to the same catalog, and are read
+through memory maps, so rendering only touches the records it needs.
+
+Record layout (little-endian):
+
+    header   length, kind, difficulty, height, width, seed, seconds, words
+    sudoku   puzzle and solution digits, two 4-bit cells per byte
+    crossword   the letters, then the word list
+    wordsearch  the letters, a bitmap of highlighted cells, the word list
+
+A word list is `words + 1` 4-byte offsets into the UTF-8 bytes that follow.
+Letters are the grid's alphabet, a count byte and a word list of its
+characters, then one byte per cell: 0 for a block, else 1 + the index of the
+cell's character, so grids of any script take one byte per cell.
+
+Usage:
+    python -m puzzleskdp catalog puzzles.pkc --sudoku hard 100000 --workers 8
+    python -m puzzleskdp book book.pdf --from-catalog puzzles.pkc --ids 0:50
+"""
+import fcntl
+import mmap
+import os
+import struct
+import time
+
+from puzzleskdp import book
+from puzzleskdp.options import add_catalog_arguments as add_arguments
+
+
+MAGIC = b"PKDPCAT2"
+RECORD = struct.Struct("<IBBBBQfI")
+OFFSET = struct.Struct("<Q")
+WORD_OFFSET = struct.Struct("<I")
+
+KINDS = ["sudoku", "crossword", "wordsearch"]
+DIFFICULTIES = [None, "easy", "medium", "hard"]
+TITLES = {"crossword": "Fill-In", "wordsearch": "Word Search"}
+
+
+def pack_digits(rows):
+    """Pack rows of digits (0 to 15) two per byte, first cell in the high nibble."""
+    cells = [int(value) for row in rows for value in row]
+    if any(not 0 <= value <= 15 for value in cells):
+        raise ValueError("only digits 0 to 15 can be packed")
+    if len(cells) % 2:
+        cells.append(0)
+    return bytes(cells[k] << 4 | cells[k + 1] for k in range(0, len(cells), 2))
+
+
+def unpack_digits(data, height, width):
+    cells = []
+    for byte in data:
+        cells.append(byte >> 4)
+        cells.append(byte & 15)
+    return [cells[i * width:(i + 1) * width] for i in range(height)]
+
+
+def pack_letters(rows):
+    """
+    Return the alphabet of a grid of characters, then one byte per cell
+    (0 for a blocked (None) cell). Raise ValueError if the grid uses more
+    than 255 distinct characters.
+    """
+    cells = [None if cell is None else cell or " " for row in rows for cell in row]
+    alphabet = sorted({cell for cell in cells if cell is not None})
+    if len(alphabet) > 255:
+        raise ValueError("only grids of up to 255 distinct characters can be packed")
+    codes = {letter: k for k, letter in enumerate(alphabet, 1)}
+    return (
+        bytes([len(alphabet)]) + pack_words(alphabet) +
+        bytes(0 if cell is None else codes[cell] for cell in cells)
+    )
+
+
+def unpack_letters(data, start, height, width):
+    """Return the grid packed at `start` in `data`, and the end of its cells."""
+    alphabet, start = unpack_words(data, start + 1, data[start])
+    cells = [None if byte == 0 else alphabet[byte - 1] for byte in data[start:start + height * width]]
+    return [cells[i * width:(i + 1) * width] for i in range(height)], start + height * width
+
+
+def pack_words(words):
+    blobs = [word.encode("utf-8") for word in words]
+    offsets, position = [], 0
+    for blob in blobs:
+        offsets.append(position)
+        position += len(blob)
+    offsets.append(position)
+    return b"".join(WORD_OFFSET.pack(offset) for offset in offsets) + b"".join(blobs)
+
+
+def unpack_words(data, start, count):
+    """Return the `count` words of the list at `start` in `data`, and the end of the list."""
+    offsets = [
+        WORD_OFFSET.unpack_from(data, start + k * WORD_OFFSET.size)[0]
+        for k in range(count + 1)
+    ]
+    base = start + (count + 1) * WORD_OFFSET.size
+    words = [bytes(data[base + offsets[k]:base + offsets[k + 1]]).decode("utf-8") for k in range(count)]
+    return words, base + offsets[-1]
+
+
+def crossword_numbers(solution):
+    """Number the cells where an across or down word starts, in reading order."""
+    height, width = len(solution), len(solution[0])
+
+    def open_cell(i, j):
+        return 0 <= i < height and 0 <= j < width and solution[i][j] is not None
+
+    starts = [
+        (i, j) for i in range(height) for j in range(width)
+        if open_cell(i, j) and (
+            (not open_cell(i, j - 1) and open_cell(i, j + 1)) or
+            (not open_cell(i - 1, j) and open_cell(i + 1, j))
+        )
+    ]
+    return {cell: n for n, cell in enumerate(starts, 1)}
+
+
+def encode(puzzle, seconds=0.0):
+    """Return the catalog record of a `BookPuzzle`."""
+    height, width = len(puzzle.solution), len(puzzle.solution[0])
+    words = list(puzzle.words)
+    if puzzle.kind == "sudoku":
+        payload = (
+            pack_digits([[cell or 0 for cell in row] for row in puzzle.grid]) +
+            pack_digits(puzzle.solution)
+        )
+        words = []
+    elif puzzle.kind == "crossword":
+        payload = pack_letters(puzzle.solution) + pack_words(words)
+    elif puzzle.kind == "wordsearch":
+        bits = bytearray((height * width + 7) // 8)
+        for i, j in puzzle.highlights:
+            k = i * width + j
+            bits[k // 8] |= 1 << (k % 8)
+        payload = pack_letters(puzzle.grid) + bytes(bits) + pack_words(words)
+    else:
+        raise ValueError(f"unknown puzzle type {puzzle.kind!r}")
+
+    header = RECORD.pack(
+        RECORD.size + len(payload), KINDS.index(puzzle.kind),
+        DIFFICULTIES.index(getattr(puzzle, "difficulty", None)),
+        height, width, puzzle.seed, seconds, len(words)
+    )
+    return header + payload
+
+
+def decode(data, offset=0):
+    """Return the `BookPuzzle` of the record at `offset` in `data`."""
+    length, kind, difficulty, height, width, seed, _, count = RECORD.unpack_from(data, offset)
+    kind, difficulty = KINDS[kind], DIFFICULTIES[difficulty]
+    start = offset + RECORD.size
+    cells = height * width
+
+    if kind == "sudoku":
+        packed = (cells + 1) // 2
+        grid = unpack_digits(data[start:start + packed], height, width)
+        solution = unpack_digits(data[start + packed:start + 2 * packed], height, width)
+        puzzle = book.BookPuzzle(
+            kind, f"Sudoku ({difficulty})",
+            [[str(v) if v else "" for v in row] for row in grid],
+            [[str(v) for v in row] for row in solution],
+            seed, box=int(round(width ** 0.5)), difficulty=difficulty
+        )
+    elif kind == "crossword":
+        solution, end = unpack_letters(data, start, height, width)
+        words, _ = unpack_words(data, end, count)
+        puzzle = book.BookPuzzle(
+            kind, TITLES[kind],
+            [["" if cell is not None else None for cell in row] for row in solution],
+            solution, seed, words=words, numbers=crossword_numbers(solution)
+        )
+    else:
+        grid, end = unpack_letters(data, start, height, width)
+        bits = data[end:end + (cells + 7) // 8]
+        highlights = {
+            (k // width, k % width) for k in range(cells)
+            if bits[k // 8] >> (k % 8) & 1
+        }
+        words, _ = unpack_words(data, end + len(bits), count)
+        puzzle = book.BookPuzzle(
+            kind, TITLES[kind], grid, grid, seed, words=words, highlights=highlights
+        )
+    return puzzle
+
+
+class CatalogWriter():
+
+    def __init__(self, path):
+        """
+        Open the catalog at `path` for appending, creating it if needed.
+        Any number of writers, in any processes, may append at once.
+        """
+        self.path = path
+        self._data = open(path, "ab")
+        self._index = open(path + ".idx", "ab")
+        with self._locked():
+            if self._data.tell() == 0:
+                self._data.write(MAGIC)
+                self._data.flush()
+
+    def _locked(self):
+        return _Lock(self._data)
+
+    def append(self, puzzle, seconds=0.0):
+        """
+        Append a `BookPuzzle`, generated in `seconds`, and return its id.
+        The record is written before its index entry, so readers never see
+        an id whose record is incomplete.
+        """
+        record = encode(puzzle, seconds)
+        with self._locked():
+            offset = self._data.seek(0, os.SEEK_END)
+            self._data.write(record)
+            self._data.flush()
+            index_end = self._index.seek(0, os.SEEK_END)
+            self._index.write(OFFSET.pack(offset))
+            self._index.flush()
+        return index_end // OFFSET.size
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Lock():
+
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+
+class Catalog():
+
+    def __init__(self, path):
+        """
+        Open the catalog at `path` for reading through memory maps.
+        Puzzles appended after opening become visible after `refresh()`.
+        """
+        self.path = path
+        self._data = open(path, "rb")
+        self._index = open(path + ".idx", "rb")
+        self._data_map = self._index_map = None
+        if self._data.read(len(MAGIC)) != MAGIC:
+            self._data.close()
+            self._index.close()
+            raise ValueError(f"{path} is not a puzzle catalog")
+        self.refresh()
+
+    def refresh(self):
+        """Map the records appended since the catalog was opened."""
+        self.close_maps()
+        # Map the index before the data: a record is written before its index
+        # entry, so every mapped entry then points inside the mapped data
+        size = os.fstat(self._index.fileno()).st_size
+        self.count = size // OFFSET.size
+        if self.count:
+            self._index_map = mmap.mmap(self._index.fileno(), self.count * OFFSET.size, access=mmap.ACCESS_READ)
+        self._data_map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close_maps(self):
+        for mapped in (self._data_map, self._index_map):
+            if mapped is not None:
+                mapped.close()
+        self._data_map = self._index_map = None
+
+    def close(self):
+        self.close_maps()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _offset(self, id):
+        if not 0 <= id < self.count:
+            raise IndexError(f"no puzzle {id} in {self.path}")
+        offset = OFFSET.unpack_from(self._index_map, id * OFFSET.size)[0]
+        end = len(self._data_map)
+        if offset + RECORD.size > end or offset + RECORD.unpack_from(self._data_map, offset)[0] > end:
+            raise ValueError(f"puzzle {id} of {self.path} is truncated")
+        return offset
+
+    def __getitem__(self, id):
+        """Return puzzle `id` as a `BookPuzzle`."""
+        return decode(self._data_map, self._offset(id))
+
+    def __iter__(self):
+        for id in range(self.count):
+            yield self[id]
+
+    def metadata(self, id):
+        """Return the type, difficulty, size, seed and generation time of puzzle `id`."""
+        _, kind, difficulty, height, width, seed, seconds, _ = RECORD.unpack_from(
+            self._data_map, self._offset(id)
+        )
+        return {
+            "type": KINDS[kind], "difficulty": DIFFICULTIES[difficulty],
+            "height": height, "width": width, "seed": seed, "seconds": seconds,
+        }
+
+
+# Per-process writers used by `catalog_task`
+_writers = {}
+
+
+def catalog_task(path, task):
+    """
+    Generate the puzzle of a (function, args) task and append it to the
+    catalog at `path` from the current process. Return its id, or None if
+    the puzzle could not be generated.
+    """
+    start = time.perf_counter()
+    puzzle = book.run_task(task)
+    seconds = time.perf_counter() - start
+    if puzzle is None:
+        return None
+    if path not in _writers:
+        _writers[path] = CatalogWriter(path)
+    return _writers[path].append(puzzle, seconds)
+
+
+def _run_catalog_task(item):
+    return catalog_task(*item)
+
+
+def fill_catalog(path, tasks, workers=None):
+    """
+    Generate `tasks` into the catalog at `path` on `workers` processes, each
+    appending its own puzzles. Return the ids of the new puzzles; ids follow
+    completion order, so they may differ from run to run with several workers.
+    """
+    CatalogWriter(path).close()
+    items = [(path, task) for task in tasks]
+    if workers == 1:
+        ids = [_run_catalog_task(item) for item in items]
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(workers) as pool:
+            ids = list(pool.imap(_run_catalog_task, items, chunksize=4))
+    return [id for id in ids if id is not None]
+
+
+def parse_ids(value, count):
+    """Parse an id range such as "10:20" (end excluded) or "5"; None means all."""
+    if value is None:
+        return range(count)
+    start, _, end = value.partition(":")
+    if not _:
+        return range(int(start), int(start) + 1)
+    return range(int(start or 0), int(end) if end else count)
+
+
+def run(args):
+    from puzzleskdp.seeding import parse_seed
+
+    seed = parse_seed(args.seed)
+    word_search = [(int(size), int(n), path, count) for size, n, path, count in args.word_search]
+    tasks = book.book_tasks(seed, args.sudoku, word_search, args.crossword, args.index)
+    if tasks:
+        ids = fill_catalog(args.path, tasks, args.workers)
+        print(f"Added {len(ids)} puzzles to {args.path} (seed {seed}).")
+    with Catalog(args.path) as catalog:
+        print(f"{len(catalog)} puzzles, {os.path.getsize(args.path)} bytes.")
@@ -0,0 +1,244 @@
+"""
+Single command line entry point for all puzzle generators.
+
+Usage:
+    python -m puzzleskdp sudoku easy 10 [--seed N] [--index PATH] [--html]
+    python -m puzzleskdp crossword structure.txt words.txt [--output PATH] [--seed N] [--pin 0 1 across WORD] [--cache PATH]
+    python -m puzzleskdp wordsearch 15 20 words.txt [--output PATH] [--seed N] [--all-directions] [--tag TAG] [--fit]
+    python -m puzzleskdp wordsearch 15 20 words.txt --count 200 [--output-dir DIR] [--workers N]
+    python -m puzzleskdp book book.pdf --sudoku medium 50 ...
+    python -m puzzleskdp serve [--port 8000 | --socket PATH] [--workers N] [--pool PATH]
+    python -m puzzleskdp pool pool.db [--fill '{"type": "sudoku", "difficulty": "easy"}' 100]
+    python -m puzzleskdp catalog puzzles.pkc --sudoku hard 1000 [--workers N]
+
+Only argparse is imported at startup. Each subcommand imports its generator
+when it runs, and rendering libraries (matplotlib, PIL) are only imported by
+the code paths that draw images.
+"""
+import argparse
+
+from puzzleskdp.generators import generator, load
+from puzzleskdp.options import add_catalog_arguments, add_pool_arguments, add_service_arguments
+from puzzleskdp.seeding import derive_seed, parse_seed
+
+
+def run_sudoku(args):
+    sudoku = generator("sudoku")
+    seed = parse_seed(args.seed)
+    index = None
+    if args.index:
+        from puzzleskdp.dedup import FingerprintIndex
+        index = FingerprintIndex(args.index)
+    print(f"Seed: {seed}")
+
+    try:
+        for i in range(args.times):
+            if index is None:
+                puzzle = sudoku.generate_puzzle(args.difficulty, derive_seed(seed, i))
+            else:
+                puzzle = sudoku.generate_unique_puzzle(args.difficulty, index, seed=derive_seed(seed, i))
+                if puzzle is None:
+                    raise SystemExit("Could not generate a new puzzle, the index is saturated.")
+
+            solved = f"puzzle_solved_{args.difficulty}_{i}"
+            incomplete = f"puzzle_{args.difficulty}_{i}"
+            if args.html:
+                sudoku.generate_html_file(puzzle.solved_puzzle, solved, puzzle.seed)
+                sudoku.generate_html_file(puzzle.incomplete_puzzle, incomplete, puzzle.seed)
+            else:
+                sudoku.generate_sudoku_grid(puzzle.solved_puzzle, solved, puzzle.seed)
+                sudoku.generate_sudoku_grid(puzzle.incomplete_puzzle, incomplete, puzzle.seed)
+    finally:
+        if index is not None:
+            index.close()
+
+
+def fill_crossword(args, generate, crossword, seed, cache):
+    """Return the creator and the fill (or None) of a crossword for the command line options."""
+    creator = generate.CrosswordCreator(crossword, seed, backjumping=args.backjump, cache=cache)
+    pinned = {
+        crossword.variable_at(int(i), int(j), direction): word
+        for i, j, direction, word in args.pin
+    }
+    if args.solver == "local":
+        local_search = load("crossword", "local_search")
+        return creator, local_search.LocalSearchFiller(crossword, seed).fill(pinned)
+    return creator, creator.solve(pinned)
+
+
+def run_crossword(args):
+    generate = generator("crossword")
+    seed = parse_seed(args.seed)
+    crossword = generate.Crossword(args.structure, args.words)
+    if args.cache and args.solver == "local":
+        raise SystemExit("--cache only applies to the backtracking solver.")
+    cache = None
+    if args.cache:
+        from puzzleskdp.solve_cache import ResultCache
+        cache = ResultCache(args.cache)
+    index = None
+    if args.index:
+        from puzzleskdp.dedup import FingerprintIndex, crossword_fingerprint
+        index = FingerprintIndex(args.index)
+
+    try:
+        # Retry with derived seeds while the fill is already in the index
+        for attempt in range(100):
+            attempt_seed = seed if attempt == 0 else derive_seed(seed, "retry", attempt)
+            creator, assignment = fill_crossword(args, generate, crossword, attempt_seed, cache)
+            if assignment is None or index is None or index.add(crossword_fingerprint(assignment.values())):
+                break
+        else:
+            raise SystemExit("Could not generate a new crossword, the index is saturated.")
+    except ValueError as e:
+        raise SystemExit(f"Invalid pin: {e}")
+    finally:
+        if index is not None:
+            index.close()
+        if cache is not None:
+            cache.close()
+    print(f"Seed: {attempt_seed}")
+
+    if assignment is None:
+        print("No solution.")
+    else:
+        creator.print(assignment)
+        if args.output:
+            creator.save(assignment, args.output)
+
+
+def run_wordsearch(args):
+    word_search = generator("wordsearch")
+    placement = load("wordsearch", "word_search_placement")
+    seed = parse_seed(args.seed)
+    directions = placement.ALL_DIRECTIONS if args.all_directions else placement.DIRECTIONS
+
+    if args.count is not None:
+        batch = load("wordsearch", "word_search_batch")
+        results = batch.generate_batch(
+            args.count, args.size, args.words_num, args.words_file, args.output_dir, seed,
+            args.workers, directions, args.tag, progress=batch.print_progress, index=args.index,
+            fit=args.fit, time_budget=args.layout_budget
+        )
+        written = sum(1 for _, _, placed, _ in results if placed)
+        print(f"{written} word search puzzles written to {args.output_dir} (seed {seed}).")
+        if written < len(results):
+            raise SystemExit(f"{len(results) - written} puzzles skipped, the index is saturated.")
+        return
+
+    index = None
+    if args.index:
+        from puzzleskdp.dedup import FingerprintIndex
+        index = FingerprintIndex(args.index)
+    try:
+        puzzle_html = word_search.generate_word_search_puzzle(
+            args.size, args.words_num, args.words_file, index=index, seed=seed, directions=directions,
+            tag=args.tag, fit=args.fit, time_budget=args.layout_budget
+        )
+    finally:
+        if index is not None:
+            index.close()
+    if puzzle_html is None:
+        raise SystemExit("Could not generate a new puzzle, the index is saturated.")
+    with open(args.output, "w") as f:
+        f.write(puzzle_html)
+    print(f"Word search puzzle generated successfully (seed {seed}).")
+
+
+def run_book(args):
+    from puzzleskdp import book
+    book.run(args)
+
+
+def run_serve(args):
+    from puzzleskdp import service
+    service.run(args)
+
+
+def run_pool(args):
+    from puzzleskdp import pool
+    pool.run(args)
+
+
+def run_catalog(args):
+    from puzzleskdp import catalog
+    catalog.run(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="puzzleskdp", description="Generate puzzles for KDP books.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sudoku = commands.add_parser("sudoku", help="generate Sudoku puzzles")
+    sudoku.add_argument("difficulty", choices=["easy", "medium", "hard"])
+    sudoku.add_argument("times", type=int)
+    sudoku.add_argument("--seed")
+    sudoku.add_argument("--index", help="fingerprint index used to reject duplicate puzzles")
+    sudoku.add_argument("--html", action="store_true", help="write HTML instead of PNG")
+    sudoku.set_defaults(run=run_sudoku)
+
+    crossword = commands.add_parser("crossword", help="fill a crossword structure")
+    crossword.add_argument("structure")
+    crossword.add_argument("words")
+    crossword.add_argument("--output", help="image file to save the filled grid to")
+    crossword.add_argument("--seed")
+    crossword.add_argument("--pin", nargs=4, action="append", default=[],
+                           metavar=("ROW", "COL", "DIRECTION", "WORD"),
+                           help="fix the across or down entry starting at ROW, COL to WORD")
+    crossword.add_argument("--solver", choices=["backtrack", "local"], default="backtrack",
+                           help="complete backtracking search, or stochastic local search for large grids")
+    crossword.add_argument("--backjump", action="store_true",
+                           help="backtrack with conflict-directed backjumping and nogood learning")
+    crossword.add_argument("--index", help="fingerprint index used to reject duplicate fills")
+    crossword.add_argument("--cache", help="result cache reused by reruns with the same inputs and seed (backtracking solver only)")
+    crossword.set_defaults(run=run_crossword)
+
+    wordsearch = commands.add_parser("wordsearch", help="generate a word search puzzle")
+    wordsearch.add_argument("size", type=int)
+    wordsearch.add_argument("words_num", type=int)
+    wordsearch.add_argument("words_file")
+    wordsearch.add_argument("--output", default="word_search_puzzle.html")
+    wordsearch.add_argument("--seed")
+    wordsearch.add_argument("--all-directions", action="store_true",
+                            help="allow all eight directions, including backwards")
+    wordsearch.add_argument("--tag", help="only use words tagged with TAG in the words file (WORD<TAB>tag,tag)")
+    wordsearch.add_argument("--fit", action="store_true",
+                            help="use the smallest grid that fits the words, SIZE being their maximum length")
+    wordsearch.add_argument("--layout-budget", type=float, metavar="SECONDS",
+                            help="time the layout optimizer may spend looking for a denser grid; "
+                                 "the grid then depends on machine speed and is not reproducible from the seed")
+    wordsearch.add_argument("--index", help="fingerprint index used to reject duplicate puzzles")
+    wordsearch.add_argument("--count", type=int,
+                            help="generate COUNT puzzles with answer keys into --output-dir on worker processes")
+    wordsearch.add_argument("--output-dir", default="word_search_puzzles")
+    wordsearch.add_argument("--workers", type=int, default=None, help="worker processes for --count")
+    wordsearch.set_defaults(run=run_wordsearch)
+
+    book = commands.add_parser("book", help="assemble a PDF book")
+    # Imported here for its arguments only; book does not import matplotlib at module level
+    from puzzleskdp.book import add_arguments
+    add_arguments(book)
+    book.set_defaults(run=run_book)
+
+    serve = commands.add_parser("serve", help="serve generate requests from warm workers")
+    add_service_arguments(serve)
+    serve.set_defaults(run=run_serve)
+
+    pool = commands.add_parser("pool", help="fill or inspect a pre-generated puzzle pool")
+    add_pool_arguments(pool)
+    pool.set_defaults(run=run_pool)
+
+    catalog = commands.add_parser("catalog", help="generate puzzles into a compact binary catalog")
+    add_catalog_arguments(catalog)
+    catalog.set_defaults(run=run_catalog)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Constraint satisfaction engine shared by the puzzle generators.
+
+A `CSP` holds variables with integer domains and constraints over them.
+Search assigns one variable at a time and propagates each change through
+the constraints watching it, from a first in, first out queue; every value
+removed is recorded on a trail, so backtracking undoes exactly the removals
+made since a mark instead of copying domains.
+
+Constraints implement `propagate(csp, var)`, called when the domain of one
+of their variables changed; new puzzle types (e.g. a Kakuro sum) only need
+a new `Constraint` subclass. Variable and value ordering are pluggable.
+"""
+from collections import deque
+
+
+class Constraint():
+
+    variables = ()
+
+    def propagate(self, csp, var):
+        """
+        Remove values made impossible by the domain of `var` having changed.
+        Return False if a domain was wiped out.
+        """
+        return True
+
+
+class KeyEqual(Constraint):
+
+    def __init__(self, x, y, key_x, key_y):
+        """
+        Constrain the values of `x` and `y` to have the same key, where
+        `key_x[value]` is the key of a value of `x` (e.g. the letter of a
+        word at a crossing) and likewise for `y`.
+        """
+        self.variables = (x, y)
+        self.keys = {x: key_x, y: key_y}
+        # Residual supports: for each direction, a value with each key
+        self.residues = {x: dict(), y: dict()}
+
+    def propagate(self, csp, var):
+        x, y = self.variables
+        other = y if var == x else x
+        return self.revise(csp, other, var)
+
+    def revise(self, csp, target, source):
+        """Remove the values of `target` without a value of `source` with the same key."""
+        key_target, key_source = self.keys[target], self.keys[source]
+        values_source = csp.domains[source]
+        residues = self.residues[source]
+        refreshed = False
+        unsupported = set()
+        for key in {key_target[value] for value in csp.domains[target]}:
+            support = residues.get(key)
+            if support is None or support not in values_source:
+                if not refreshed:
+                    residues.clear()
+                    residues.update((key_source[value], value) for value in values_source)
+                    refreshed = True
+                if key not in residues:
+                    unsupported.add(key)
+        if not unsupported:
+            return True
+        return csp.remove_all(target, [
+            value for value in csp.domains[target] if key_target[value] in unsupported
+        ])
+
+
+class AllDifferent(Constraint):
+
+    def __init__(self, variables):
+        """Constrain `variables` to take pairwise different values."""
+        self.variables = tuple(variables)
+
+    def propagate(self, csp, var):
+        domain = csp.domains[var]
+        if len(domain) != 1:
+            return True
+        value = next(iter(domain))
+        for other in self.variables:
+            if other != var and value in csp.domains[other]:
+                if not csp.remove(other, value):
+                    return False
+        return True
+
+
+def first_unassigned(csp):
+    """Variable ordering: the unassigned variable with the lowest id."""
+    for var, domain in enumerate(csp.domains):
+        if len(domain) > 1:
+            return var
+    return None
+
+
+def smallest_domain(csp):
+    """
+    Variable ordering: the unassigned variable with the fewest values left,
+    then with the most constraints (minimum remaining values and degree).
+    """
+    best, best_key = None, None
+    for var, domain in enumerate(csp.domains):
+        if len(domain) > 1:
+            key = (len(domain), -len(csp.watchers[var]))
+            if best_key is None or key < best_key:
+                best, best_key = var, key
+    return best
+
+
+def ascending(csp, var):
+    """Value ordering: smallest value first."""
+    return sorted(csp.domains[var])
+
+
+class CSP():
+
+    def __init__(self):
+        self.domains = []
+        self.constraints = []
+        # For each variable, the constraints over it
+        self.watchers = []
+        self.trail = []
+        self.queue = deque()
+        self.queued = set()
+        self.stats = {"nodes": 0, "backtracks": 0, "propagations": 0, "removals": 0}
+
+    def add_variable(self, domain):
+        """Add a variable with the integer values of `domain`; return its id."""
+        self.domains.append(set(domain))
+        self.watchers.append([])
+        return len(self.domains) - 1
+
+    def add_constraint(self, constraint):
+        self.constraints.append(constraint)
+        for var in constraint.variables:
+            self.watchers[var].append(constraint)
+        return constraint
+
+    def mark(self):
+        """Return a mark of the trail to `undo` back to."""
+        return len(self.trail)
+
+    def undo(self, mark):
+        """Restore every value removed since `mark`."""
+        trail, domains = self.trail, self.domains
+        while len(trail) > mark:
+            var, value = trail.pop()
+            domains[var].add(value)
+        self.queue.clear()
+        self.queued.clear()
+
+    def remove(self, var, value):
+        """
+        Remove `value` from the domain of `var` and queue its constraints.
+        Return False if the domain is now empty. Removing a value that is not
+        in the domain changes nothing.
+        """
+        domain = self.domains[var]
+        if value not in domain:
+            return bool(domain)
+        domain.remove(value)
+        self.trail.append((var, value))
+        self.stats["removals"] += 1
+        if var not in self.queued:
+            self.queue.append(var)
+            self.queued.add(var)
+        return bool(domain)
+
+    def remove_all(self, var, values):
+        """Remove each of `values` from the domain of `var`, as `remove`."""
+        for value in values:
+            self.remove(var, value)
+        return bool(self.domains[var])
+
+    def assign(self, var, value):
+        """Reduce the domain of `var` to `value`. Return False if it was not in it."""
+        if value not in self.domains[var]:
+            return False
+        return self.remove_all(var, [other for other in self.domains[var] if other != value])
+
+    def propagate(self, variables=()):
+        """
+        Propagate the changes queued by removals, and those of `variables`,
+        until no constraint removes anything. Return False on a wipeout.
+        """
+        for var in variables:
+            if var not in self.queued:
+                self.queue.append(var)
+                self.queued.add(var)
+        queue, queued = self.queue, self.queued
+        while queue:
+            var = queue.popleft()
+            queued.discard(var)
+            for constraint in self.watchers[var]:
+                self.stats["propagations"] += 1
+                if not constraint.propagate(self, var):
+                    queue.clear()
+                    queued.clear()
+                    return False
+        return True
+
+    def values(self):
+        """Return the value of each variable, or None where it is not assigned."""
+        return [next(iter(domain)) if len(domain) == 1 else None for domain in self.domains]
+
+    def solve(self, select=smallest_domain, order=ascending):
+        """
+        Return the value of each variable in a solution, or None.
+
+        `select(csp)` returns the next variable to assign (None once all are)
+        and `order(csp, var)` the values to try for it, in order.
+        """
+        if not self.propagate(range(len(self.domains))):
+            return None
+        if any(not domain for domain in self.domains):
+            return None
+        return self.search(select, order)
+
+    def search(self, select, order):
+        var = select(self)
+        if var is None:
+            return self.values()
+        for value in order(self, var):
+            if value not in self.domains[var]:
+                continue
+            self.stats["nodes"] += 1
+            mark = self.mark()
+            if self.assign(var, value) and self.propagate():
+                result = self.search(select, order)
+                if result is not None:
+                    return result
+            self.undo(mark)
+            self.stats["backtracks"] += 1
+        return None
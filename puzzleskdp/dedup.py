@@ -0,0 +1,267 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+from itertools import permutations
+
+
+MAGIC = b"PKDPIDX1"
+HEADER = struct.Struct("<8sQQ")
+SLOT_SIZE = 16
+EMPTY_SLOT = bytes(SLOT_SIZE)
+INITIAL_CAPACITY = 1 << 16
+
+
+def fingerprint(data):
+    """
+    Return the 16-byte fingerprint of a canonical form.
+    `data` is a `str` or `bytes` object.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    digest = hashlib.blake2b(data, digest_size=SLOT_SIZE).digest()
+    # The all-zero digest marks an empty slot in the index file
+    if digest == EMPTY_SLOT:
+        digest = EMPTY_SLOT[:-1] + b"\x01"
+    return digest
+
+
+def _dihedral(grid):
+    """
+    Yield the 8 rotations and reflections of a square grid given as a list
+    of rows.
+    """
+    current = [list(row) for row in grid]
+    for _ in range(4):
+        yield current
+        yield [row[::-1] for row in current]
+        current = [list(row) for row in zip(*current[::-1])]
+
+
+def _relabel(grid):
+    """
+    Return `grid` flattened, with digits renumbered in order of first
+    appearance. Empty cells (0) are left untouched.
+    """
+    labels = {0: 0}
+    flat = []
+    for row in grid:
+        for value in row:
+            if value not in labels:
+                labels[value] = len(labels)
+            flat.append(labels[value])
+    return tuple(flat)
+
+
+def sudoku_canonical_form(grid):
+    """
+    Return the minimal-lexicographic form of a 9x9 Sudoku grid under
+    rotations, reflections, band and stack permutations and digit
+    relabeling. Puzzles related by these transformations share the same
+    canonical form. Row swaps within a band and column swaps within a stack
+    are not covered: they would multiply the 10,368 forms compared here by
+    1,296 squared, so such copies get different fingerprints.
+    """
+    best = None
+    bands = list(permutations(range(3)))
+    for variant in _dihedral(grid):
+        for band_order in bands:
+            rows = [variant[3 * band + k] for band in band_order for k in range(3)]
+            for stack_order in bands:
+                columns = [3 * stack + k for stack in stack_order for k in range(3)]
+                candidate = _relabel([row[c] for c in columns] for row in rows)
+                if best is None or candidate < best:
+                    best = candidate
+    return bytes(best)
+
+
+def sudoku_fingerprint(grid):
+    """Return the fingerprint of a Sudoku grid."""
+    return fingerprint(b"sudoku:" + sudoku_canonical_form(grid))
+
+
+def crossword_fingerprint(words):
+    """
+    Return the fingerprint of a crossword fill.
+    `words` is an iterable of the words in the fill, e.g. the values of an
+    assignment returned by `CrosswordCreator.solve`.
+    """
+    return fingerprint("crossword:" + ",".join(sorted(w.upper() for w in words)))
+
+
+def word_search_fingerprint(grid, words, cells):
+    """
+    Return the fingerprint of a word search puzzle, given the `cells`
+    ((row, col) pairs) its hidden words cover.
+    Only the letters of those cells are compared, not the random filler, and
+    up to rotation and reflection, so puzzles hiding the same words in the
+    same places (or mirrored copies of them) are detected as duplicates.
+    """
+    cells = set(cells)
+    unfilled = [
+        [letter if (i, j) in cells else "." for j, letter in enumerate(row)]
+        for i, row in enumerate(grid)
+    ]
+    layout = min(
+        "/".join("".join(row) for row in variant)
+        for variant in _dihedral(unfilled)
+    )
+    hidden = ",".join(sorted(set(w.upper() for w in words)))
+    return fingerprint(f"wordsearch:{hidden}:{layout}")
+
+
+class FingerprintIndex():
+
+    def __init__(self, path, capacity=INITIAL_CAPACITY):
+        """
+        Open (or create) a persistent fingerprint index at `path`.
+
+        The index is an open-addressing hash table of fixed-size slots stored
+        in a memory-mapped file, so lookups are O(1) and only the pages that
+        are touched are read into memory. `capacity` (a power of two) is only
+        used when creating a new file; the table doubles as it fills up.
+
+        Several processes may share an index: every operation holds an
+        advisory lock on `path + ".lock"` and first picks up the inserts and
+        growth done by other processes.
+        """
+        self.path = path
+        self._map = None
+        self._lock = open(path + ".lock", "a+b")
+        try:
+            with self._locked(fcntl.LOCK_EX):
+                if not os.path.exists(path):
+                    self._create(path, capacity)
+                self._open()
+        except BaseException:
+            self._lock.close()
+            raise
+
+    def _locked(self, operation):
+        return _FileLock(self._lock, operation)
+
+    @staticmethod
+    def _create(path, capacity):
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, capacity, 0))
+            f.truncate(HEADER.size + capacity * SLOT_SIZE)
+
+    def _open(self):
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.capacity, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._close_map()
+            raise ValueError(f"{self.path} is not a fingerprint index")
+
+    def _sync(self):
+        """
+        Reopen the index if another process replaced it by a grown copy,
+        and re-read its header. Called with the lock held.
+        """
+        if os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino:
+            self._close_map()
+            self._open()
+        else:
+            _, self.capacity, self.count = HEADER.unpack_from(self._map, 0)
+
+    def _close_map(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def close(self):
+        """Flush the index to disk and release the file."""
+        self._close_map()
+        if not self._lock.closed:
+            self._lock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            return self.count
+
+    def _find(self, digest):
+        """
+        Return the offset of the slot holding `digest`, or of the empty slot
+        where it would be inserted.
+        """
+        mask = self.capacity - 1
+        slot = int.from_bytes(digest[:8], "little") & mask
+        while True:
+            offset = HEADER.size + slot * SLOT_SIZE
+            stored = self._map[offset:offset + SLOT_SIZE]
+            if stored == digest or stored == EMPTY_SLOT:
+                return offset
+            slot = (slot + 1) & mask
+
+    def __contains__(self, digest):
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            offset = self._find(digest)
+            return self._map[offset:offset + SLOT_SIZE] == digest
+
+    def add(self, digest):
+        """
+        Add `digest` to the index.
+        Return True if it was new; return False if it was already present.
+        """
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            return self._add(digest)
+
+    def _add(self, digest):
+        offset = self._find(digest)
+        if self._map[offset:offset + SLOT_SIZE] == digest:
+            return False
+        self._map[offset:offset + SLOT_SIZE] = digest
+        self.count += 1
+        HEADER.pack_into(self._map, 0, MAGIC, self.capacity, self.count)
+        # Keep the load factor at or below one half so probes stay short
+        if 2 * self.count > self.capacity:
+            self._grow()
+        return True
+
+    def _grow(self):
+        """
+        Rehash every fingerprint into a table twice the current size, and
+        swap it in. Called with the lock held; other processes reopen the
+        new file on their next operation.
+        """
+        tmp_path = self.path + ".tmp"
+        self._create(tmp_path, 2 * self.capacity)
+        grown = FingerprintIndex(tmp_path)
+        end = HEADER.size + self.capacity * SLOT_SIZE
+        for offset in range(HEADER.size, end, SLOT_SIZE):
+            stored = self._map[offset:offset + SLOT_SIZE]
+            if stored != EMPTY_SLOT:
+                grown._add(stored)
+        grown.close()
+        os.remove(tmp_path + ".lock")
+        self._close_map()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+
+class _FileLock():
+
+    def __init__(self, file, operation):
+        self.file = file
+        self.operation = operation
+
+    def __enter__(self):
+        fcntl.flock(self.file.fileno(), self.operation)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
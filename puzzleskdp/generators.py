@@ -0,0 +1,32 @@
+import importlib
+import os
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Puzzle type -> (directory, module) of its generator script
+GENERATORS = {
+    "crossword": ("crossword", "generate"),
+    "sudoku": ("sudoku", "sudoku"),
+    "wordsearch": ("wordsearch", "word_search_inputs"),
+}
+
+
+def load(directory, module):
+    """
+    Import `module` from one of the generator directories.
+
+    The generator scripts import their siblings by plain name (e.g.
+    `from crossword import *`), so their directory is put on `sys.path`
+    ahead of the repository root.
+    """
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+def generator(kind):
+    """Import and return the generator module for a puzzle type."""
+    return load(*GENERATORS[kind])
@@ -0,0 +1,102 @@
+import io
+
+
+BOOTSTRAP_CSS = "https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css"
+
+DOCUMENT_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+    <title>{title}</title>
+{meta}    <link rel="stylesheet" href="{css}">
+    <style>
+{styles}
+        .page {{
+            page-break-after: always;
+        }}
+        .page:last-child {{
+            page-break-after: auto;
+        }}
+    </style>
+</head>
+<body>
+"""
+
+DOCUMENT_TAIL = """</body>
+</html>
+"""
+
+META = '    <meta name="{}" content="{}">\n'.format
+PAGE_OPEN = '<div class="page">\n'
+PAGE_CLOSE = '</div>\n'
+
+
+class HtmlDocument:
+    """
+    An HTML document written incrementally to a text stream.
+
+    The head is written when the document is opened and the tail when it is
+    closed; in between each page is rendered straight into the stream, so a
+    document with hundreds of puzzles never has to be held in memory.
+
+    `styles` is a list of CSS blocks, one per kind of puzzle in the document,
+    and `meta` an optional mapping of <meta> names to values.
+    """
+
+    def __init__(self, stream, title, styles=(), meta=None):
+        self.stream = stream
+        self.title = title
+        self.styles = styles
+        self.meta = meta or {}
+        self.pages = 0
+        self._opened = False
+
+    def open(self):
+        if not self._opened:
+            self.stream.write(DOCUMENT_HEAD.format(
+                title=self.title,
+                meta="".join(META(name, value) for name, value in self.meta.items()),
+                css=BOOTSTRAP_CSS,
+                styles="\n".join(self.styles),
+            ))
+            self._opened = True
+        return self
+
+    def add_page(self, render, *args, **kwargs):
+        """
+        Add a page rendered by `render(stream, *args, **kwargs)`.
+        """
+        self.open()
+        self.stream.write(PAGE_OPEN)
+        render(self.stream, *args, **kwargs)
+        self.stream.write(PAGE_CLOSE)
+        self.pages += 1
+
+    def close(self):
+        self.open()
+        self.stream.write(DOCUMENT_TAIL)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_document(stream, title, styles, pages, meta=None):
+    """
+    Write a multi-page document to `stream`.
+    `pages` is an iterable (typically a generator) of `(render, args)` pairs,
+    consumed one page at a time. Return the number of pages written.
+    """
+    with HtmlDocument(stream, title, styles, meta) as document:
+        for render, args in pages:
+            document.add_page(render, *args)
+    return document.pages
+
+
+def render_document(title, styles, render, *args, meta=None):
+    """Render a single-page document to a string."""
+    buffer = io.StringIO()
+    with HtmlDocument(buffer, title, styles, meta) as document:
+        document.add_page(render, *args)
+    return buffer.getvalue()
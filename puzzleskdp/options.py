@@ -0,0 +1,44 @@
+"""
+Command line options of the subcommands whose modules are costly to import.
+
+The service, pool and catalog modules pull in asyncio, process pools,
+sqlite3 or mmap; their options are declared here, importing nothing, so that
+building the command line parser stays as cheap as importing argparse.
+"""
+
+
+def add_service_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--timeout", type=float, default=30, help="default request timeout in seconds")
+    parser.add_argument("--max-pending", type=int, default=64, help="requests queued before rejecting")
+    parser.add_argument("--preload-words", action="append", default=[], metavar="WORDS_FILE")
+    parser.add_argument("--preload-crossword", nargs=2, action="append", default=[],
+                        metavar=("STRUCTURE", "WORDS"))
+    parser.add_argument("--pool", metavar="PATH", help="answer unseeded requests from this puzzle pool")
+    parser.add_argument("--pool-low", type=int, default=10, help="refill a pool below this many puzzles")
+    parser.add_argument("--pool-target", type=int, default=50, help="refill a pool up to this many puzzles")
+    parser.add_argument("--pool-request", action="append", default=[], metavar="JSON",
+                        help="request whose pool is filled at startup")
+
+
+def add_pool_arguments(parser):
+    parser.add_argument("path", help="SQLite database of the pool")
+    parser.add_argument("--fill", nargs=2, action="append", default=[], metavar=("REQUEST", "COUNT"),
+                        help='generate COUNT puzzles for a JSON request, e.g. \'{"type": "sudoku"}\'')
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+
+
+def add_catalog_arguments(parser):
+    parser.add_argument("path", help="catalog file to append to")
+    parser.add_argument("--sudoku", nargs=2, action="append", default=[],
+                        metavar=("DIFFICULTY", "COUNT"))
+    parser.add_argument("--word-search", nargs=4, action="append", default=[],
+                        metavar=("SIZE", "WORDS_NUM", "WORDS_FILE", "COUNT"))
+    parser.add_argument("--crossword", nargs=3, action="append", default=[],
+                        metavar=("STRUCTURE", "WORDS", "COUNT"))
+    parser.add_argument("--seed", help="seed of the batch (random if omitted)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--index", help="fingerprint index used to reject duplicate puzzles")
@@ -0,0 +1,204 @@
+"""
+Pool of pre-generated puzzles.
+
+Puzzles are generated ahead of time per kind of request (puzzle type plus
+its parameters, e.g. difficulty, size or structure) and kept in a SQLite
+store, so a request is answered with a stored puzzle immediately. Taking a
+puzzle from a pool that has dropped below its low watermark tops it back up
+to its target on worker processes, in the background.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from puzzleskdp import book
+from puzzleskdp.options import add_pool_arguments as add_arguments
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS puzzles_key ON puzzles (key, id);
+"""
+
+
+def pool_key(request):
+    """
+    Return the key of the pool a request draws from: its parameters without
+    the seed and timeout, in a canonical form.
+    """
+    return json.dumps(
+        {name: value for name, value in request.items() if name not in ("seed", "timeout")},
+        sort_keys=True
+    )
+
+
+class PuzzlePool():
+
+    def __init__(self, path, low=10, target=50, executor=None, workers=None, max_in_flight=None):
+        """
+        Open (or create) a pool stored in the SQLite database at `path`.
+
+        A pool is refilled to `target` puzzles once it holds fewer than `low`,
+        counting puzzles still being generated. Generation runs on `executor`,
+        or on a new process pool of `workers` processes if None. At most
+        `max_in_flight` refill tasks (by default one per worker) are on the
+        executor at once, the others wait in a queue, so refills never hold
+        back more than one puzzle's worth of work from requests sharing it.
+        """
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        # Reentrant: a task that is already done runs its callback on submit
+        self.lock = threading.RLock()
+        self.done = threading.Condition(self.lock)
+        self.low = low
+        self.target = target
+        self._own_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(workers)
+        self.max_in_flight = max_in_flight or workers or os.cpu_count() or 1
+        # Puzzles queued or being generated, per pool key
+        self.in_flight = dict()
+        # (request, key) of each puzzle waiting for an executor slot
+        self.queue = deque()
+        self.running = 0
+        self.closed = False
+
+    def count(self, key):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM puzzles WHERE key = ?", (key,)).fetchone()[0]
+
+    def stats(self):
+        """Return a mapping of pool key to number of stored puzzles."""
+        with self.lock:
+            return dict(self.db.execute("SELECT key, COUNT(*) FROM puzzles GROUP BY key"))
+
+    def take(self, request):
+        """
+        Remove and return the oldest stored puzzle for `request` (as a
+        dictionary, see `book.puzzle_to_dict`), or None if the pool is empty.
+
+        Taking a puzzle starts a background refill if the pool is running
+        low. A miss does not: the caller should first submit the generation
+        of the puzzle it needs, then call `refill`, so that its request is
+        not queued behind the refill.
+        """
+        key = pool_key(request)
+        with self.lock:
+            # An immediate transaction stops two processes taking the same puzzle
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.db.execute(
+                    "SELECT id, data FROM puzzles WHERE key = ? ORDER BY id LIMIT 1", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.db.execute("DELETE FROM puzzles WHERE id = ?", (row[0],))
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        self.refill(request)
+        return json.loads(row[1])
+
+    def refill(self, request):
+        """
+        Queue generation tasks to bring the pool for `request` back to its
+        target, if it is below the low watermark. Return the number of
+        puzzles queued. Raise ValueError if the request is malformed.
+        """
+        # Each stored puzzle gets its own fresh seed
+        request = {name: value for name, value in request.items() if name != "seed"}
+        book.request_task(request)
+        key = pool_key(request)
+        stored = self.count(key)
+        with self.lock:
+            available = stored + self.in_flight.get(key, 0)
+            if available >= self.low:
+                return 0
+            missing = self.target - available
+            self._enqueue(request, key, missing)
+        return missing
+
+    def fill(self, request, count):
+        """
+        Generate `count` puzzles for `request`, wait until they are stored and
+        return the size of its pool.
+        """
+        request = {name: value for name, value in request.items() if name != "seed"}
+        book.request_task(request)
+        key = pool_key(request)
+        with self.lock:
+            self._enqueue(request, key, count)
+            self.done.wait_for(lambda: self.closed or not self.in_flight.get(key))
+        return self.count(key)
+
+    def _enqueue(self, request, key, count):
+        with self.lock:
+            self.in_flight[key] = self.in_flight.get(key, 0) + count
+            self.queue.extend([(request, key)] * count)
+            self._pump()
+
+    def _pump(self):
+        """Submit queued tasks while fewer than `max_in_flight` are running."""
+        with self.lock:
+            while self.queue and self.running < self.max_in_flight and not self.closed:
+                request, key = self.queue.popleft()
+                self.running += 1
+                try:
+                    future = self.executor.submit(book.run_task, book.request_task(request))
+                except RuntimeError:
+                    # The executor was shut down
+                    self.running -= 1
+                    self.in_flight[key] -= 1
+                    continue
+                future.add_done_callback(lambda f, key=key: self._store(key, f))
+
+    def _store(self, key, future):
+        """Done callback of a generation task: store its puzzle, submit the next task."""
+        try:
+            if not future.cancelled() and future.exception() is None and future.result() is not None:
+                with self.lock:
+                    if not self.closed:
+                        self.db.execute(
+                            "INSERT INTO puzzles (key, data, created) VALUES (?, ?, ?)",
+                            (key, json.dumps(book.puzzle_to_dict(future.result())), time.time())
+                        )
+        finally:
+            with self.lock:
+                self.in_flight[key] -= 1
+                self.running -= 1
+                self.done.notify_all()
+                self._pump()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            for _, key in self.queue:
+                self.in_flight[key] -= 1
+            self.queue.clear()
+            self.done.notify_all()
+        if self._own_executor:
+            self.executor.shutdown(cancel_futures=True)
+        with self.lock:
+            self.db.close()
+
+
+def run(args):
+    pool = PuzzlePool(args.path, workers=args.workers)
+    try:
+        for request, count in args.fill:
+            pool.fill(json.loads(request), int(count))
+        for key, count in sorted(pool.stats().items()):
+            print(f"{count:8d}  {key}")
+    finally:
+        pool.close()
@@ -0,0 +1,33 @@
+import hashlib
+import os
+import random
+
+
+def new_seed():
+    """Return a fresh random 64-bit seed."""
+    return int.from_bytes(os.urandom(8), "little")
+
+
+def derive_seed(seed, *keys):
+    """
+    Return the 64-bit seed of the sub-stream identified by `keys` under
+    `seed`, e.g. `derive_seed(seed, i)` for the i-th puzzle of a batch.
+
+    The result only depends on its arguments, so puzzle i gets the same seed
+    no matter which worker generates it or how the batch is split.
+    """
+    data = ":".join(str(key) for key in (seed,) + keys).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def make_rng(seed=None):
+    """Return a `random.Random` seeded with `seed` (random if None)."""
+    return random.Random(new_seed() if seed is None else seed)
+
+
+def parse_seed(value):
+    """
+    Parse a seed given on the command line.
+    Return a fresh seed if `value` is None.
+    """
+    return new_seed() if value is None else int(value)
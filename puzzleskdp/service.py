@@ -0,0 +1,218 @@
+"""
+Long-running generation service.
+
+Serves puzzles over HTTP, on a TCP port or a Unix socket, from a pool of
+warm worker processes. Each worker keeps the generator modules imported and
+the vocabularies and crossword structures it has parsed, so a request costs
+a solve rather than a Python start-up.
+
+    POST /generate  {"type": "sudoku", "difficulty": "easy", "seed": 1}
+                    {"type": "wordsearch", "size": 15, "words_num": 20, "words_file": "words.txt"}
+                    {"type": "crossword", "structure": "structure.txt", "words": "words.txt"}
+    GET  /health
+
+Every request may set "timeout" (seconds); "seed" is random if omitted and
+always returned with the puzzle. With --pool, requests without a seed are
+answered from pre-generated puzzles (see puzzleskdp.pool).
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from puzzleskdp import book
+from puzzleskdp.generators import GENERATORS, generator
+from puzzleskdp.options import add_service_arguments as add_arguments
+
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class RequestError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _warm(vocabularies, crosswords):
+    """Worker initializer: import every generator and parse the preloaded inputs."""
+    for kind in GENERATORS:
+        generator(kind)
+    for words_file in vocabularies:
+        book.load_vocabulary(words_file)
+    for structure_file, words_file in crosswords:
+        book.load_crossword(structure_file, words_file)
+
+
+class GenerationService():
+
+    def __init__(self, workers=None, timeout=30, max_pending=64,
+                 vocabularies=(), crosswords=(), pool=None, pool_low=10, pool_target=50):
+        """
+        Create a service generating puzzles on `workers` processes.
+
+        At most `max_pending` requests are queued or running at once; further
+        requests are rejected with 503. `timeout` is the default time limit of
+        a request in seconds. `vocabularies` (word files) and `crosswords`
+        ((structure, words) file pairs) are parsed by every worker up front.
+
+        If `pool` is the path of a puzzle pool database, requests without a
+        seed are answered from the pool, which the workers refill between
+        `pool_low` and `pool_target` puzzles per kind of request. Refills use
+        at most half of the workers, leaving the others free for misses.
+        """
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_warm,
+            initargs=(list(vocabularies), [tuple(pair) for pair in crosswords])
+        )
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.pending = 0
+        self.pool = None
+        if pool:
+            from puzzleskdp.pool import PuzzlePool
+            workers = workers or os.cpu_count() or 1
+            self.pool = PuzzlePool(pool, pool_low, pool_target, self.executor,
+                                   max_in_flight=max(1, workers // 2))
+
+    async def generate(self, request):
+        if self.pending >= self.max_pending:
+            raise RequestError(503, "too many pending requests")
+        try:
+            function, args = book.request_task(request)
+        except ValueError as e:
+            raise RequestError(400, str(e))
+
+        # A seeded request asks for one specific puzzle, which the pool cannot serve
+        pooled = self.pool is not None and request.get("seed") is None
+        if pooled:
+            puzzle = self.pool.take(request)
+            if puzzle is not None:
+                return puzzle
+        try:
+            timeout = float(request.get("timeout", self.timeout))
+        except (TypeError, ValueError):
+            raise RequestError(400, "timeout must be a number")
+
+        loop = asyncio.get_running_loop()
+        future = self.executor.submit(book.run_task, (function, args))
+        # A request stays pending until its worker is done with it, even past
+        # its timeout: the worker cannot be interrupted, so `max_pending`
+        # bounds the work actually held by the executor
+        self.pending += 1
+        future.add_done_callback(lambda _: self._call_soon(loop, self._release))
+        if pooled:
+            # Refill an empty pool only once this request is ahead in the queue
+            self.pool.refill(request)
+        try:
+            puzzle = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise RequestError(504, f"generation timed out after {timeout} seconds")
+        except (OSError, ValueError, KeyError) as e:
+            raise RequestError(400, f"generation failed: {e}")
+
+        if puzzle is None:
+            raise RequestError(500, "no solution")
+        return book.puzzle_to_dict(puzzle)
+
+    def _release(self):
+        self.pending -= 1
+
+    @staticmethod
+    def _call_soon(loop, callback):
+        """Run `callback` on the event loop from an executor thread, unless the loop is closed."""
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass
+
+    async def dispatch(self, method, path, body):
+        if path == "/health":
+            health = {"status": "ok", "pending": self.pending}
+            if self.pool is not None:
+                health["pool"] = self.pool.stats()
+            return 200, health
+        if path != "/generate":
+            raise RequestError(404, f"no route {path}")
+        if method != "POST":
+            raise RequestError(405, "use POST")
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "body is not valid JSON")
+        if not isinstance(request, dict):
+            raise RequestError(400, "body must be a JSON object")
+        return 200, await self.generate(request)
+
+    async def handle(self, reader, writer):
+        """Serve one HTTP/1.1 request on a connection, then close it."""
+        try:
+            try:
+                method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1").strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.dispatch(method, path, body)
+            except RequestError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (ValueError, asyncio.IncompleteReadError):
+                status, payload = 400, {"error": "malformed HTTP request"}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+            data = json.dumps(payload).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8000, socket=None):
+        """Serve requests until cancelled, on a Unix `socket` if given, else on host:port."""
+        if socket:
+            server = await asyncio.start_unix_server(self.handle, path=socket)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+            self.executor.shutdown(cancel_futures=True)
+
+
+def run(args):
+    service = GenerationService(
+        args.workers, args.timeout, args.max_pending,
+        args.preload_words, args.preload_crossword,
+        args.pool, args.pool_low, args.pool_target
+    )
+    if service.pool is not None:
+        for request in args.pool_request:
+            service.pool.refill(json.loads(request))
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Serving puzzles on {where}")
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
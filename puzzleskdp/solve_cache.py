@@ -0,0 +1,105 @@
+"""
+Persistent cache of solver results.
+
+Results are stored in a SQLite database under a content address: a hash of
+everything that determines the result (e.g. a crossword's structure and
+vocabulary, the solver settings and the seed), so a rerun with the same
+inputs reads the result back instead of solving again, and any change to the
+inputs misses. The cache is bounded in size and evicts the least recently
+used results first. Writes run in immediate transactions on a database in
+WAL mode, so several processes can share one cache.
+
+Usage:
+    python -m puzzleskdp crossword structure.txt words.txt --seed 1 --cache solves.db
+    python -m puzzleskdp book book.pdf --crossword structure.txt words.txt 20 --solve-cache solves.db
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+def content_key(*parts):
+    """
+    Return the hex digest addressing a result computed from `parts`, any
+    JSON-serializable values, e.g. file digests, settings and a seed.
+    """
+    data = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class ResultCache():
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        """
+        Open (or create) a cache stored in the SQLite database at `path`,
+        holding at most `max_bytes` of results.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the result stored under `key`, or None, marking it as recently used."""
+        row = self.db.execute("SELECT data FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        """
+        Store `result`, a JSON-serializable value, under `key`, then evict
+        the least recently used results until the cache fits its size.
+        """
+        data = json.dumps(result, separators=(",", ":"))
+        # An immediate transaction stops two processes evicting at once
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO results (key, data, size, used) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time())
+            )
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = 0
+                for old, size in self.db.execute("SELECT key, size FROM results ORDER BY used").fetchall():
+                    if total - evicted <= self.max_bytes or old == key:
+                        break
+                    self.db.execute("DELETE FROM results WHERE key = ?", (old,))
+                    evicted += size
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        """Return the number and total size of stored results, and this session's hits and misses."""
+        count, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"results": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
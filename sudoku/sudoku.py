@@ -1,10 +1,15 @@
+import os
 import sys
 import random
 from enum import Enum
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
-from PIL import Image, ImageDraw
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.csp import CSP, AllDifferent, ascending, first_unassigned
+from puzzleskdp.dedup import FingerprintIndex, sudoku_fingerprint
+from puzzleskdp.html_stream import render_document, write_document
+from puzzleskdp.seeding import derive_seed, new_seed, parse_seed
+from sudoku_grid import SudokuGrid, validate_solutions
 
 
 class SudokuPuzzle:
@@ -13,11 +18,14 @@ class SudokuPuzzle:
         MEDIUM = "medium"
         HARD = "hard"
         
-    def __init__(self, difficulty):
+    def __init__(self, difficulty, rng=None):
         self.puzzle = [[0] * 9 for _ in range(9)]
         self.incomplete_puzzle = None
         self.solved_puzzle = None
         self.difficulty = SudokuPuzzle.DIFFICULTY(difficulty)
+        self.rng = random if rng is None else rng
+        self.seed = None
+        self.stats = None
 
     def clues_to_remove(self):
         if self.difficulty == SudokuPuzzle.DIFFICULTY.EASY: return 35
@@ -30,140 +38,135 @@ class SudokuPuzzle:
         return self.puzzle
 
     def generate_incomplete_puzzle(self):
-        incomplete_puzzle = [row.copy() for row in self.puzzle]
+        incomplete_puzzle = SudokuGrid(self.puzzle)
         num_clues = self.clues_to_remove()
 
-        for _ in range(num_clues):
-            while True:
-                row = random.randint(0, 8)
-                col = random.randint(0, 8)
-                if incomplete_puzzle[row][col] != 0:
-                    incomplete_puzzle[row][col] = 0
-                    break
+        # The solved puzzle has no empty cells, so any sample of positions
+        # removes exactly `num_clues` clues
+        cells = incomplete_puzzle.cells.reshape(-1)
+        cells[self.rng.sample(range(cells.size), num_clues)] = 0
 
         return incomplete_puzzle
 
     def _fill_diagonal_grids(self):
         for i in range(0, 9, 3):
             digits = list(range(1, 10))
-            random.shuffle(digits)
+            self.rng.shuffle(digits)
             for j in range(3):
                 for k in range(3):
                     self.puzzle[i+j][i+k] = digits.pop()
 
     def _solve_puzzle(self):
-        find = self._find_empty()
-        if not find:
-            return True
-        else:
-            row, col = find
-
-        for num in range(1, 10):
-            if self._is_valid(num, row, col):
-                self.puzzle[row][col] = num
-
-                if self._solve_puzzle():
-                    return True
-
-                self.puzzle[row][col] = 0
-
-        return False
-
-    def _is_valid(self, num, row, col):
-        for i in range(9):
-            if self.puzzle[row][i] == num:
-                return False
-
-        for i in range(9):
-            if self.puzzle[i][col] == num:
-                return False
-
-        start_row = (row // 3) * 3
-        start_col = (col // 3) * 3
-        for i in range(3):
-            for j in range(3):
-                if self.puzzle[start_row + i][start_col + j] == num:
-                    return False
-
+        """
+        Complete `self.puzzle` by search on the shared CSP engine: one
+        variable per cell, all different in each row, column and box.
+        Cells are filled in row-major order with the smallest digit first,
+        so the solution is the one plain backtracking would find.
+        """
+        csp = sudoku_csp(self.puzzle)
+        solution = csp.solve(select=first_unassigned, order=ascending)
+        self.stats = csp.stats
+        if solution is None:
+            return False
+        size = len(self.puzzle)
+        for i in range(size):
+            self.puzzle[i] = solution[size * i:size * (i + 1)]
         return True
 
-    def _find_empty(self):
-        for i in range(9):
-            for j in range(9):
-                if self.puzzle[i][j] == 0:
-                    return i, j
-        return None
-
-def generate_html(puzzle):
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Sudoku Puzzle</title>
-        <link rel="stylesheet" href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css">
-        <style>
-            .grid {
-                display: grid;
-                grid-template-columns: repeat(9, 1fr);
-                grid-template-rows: repeat(9, 1fr);
-                
-                border: 2px solid #333;
-                
-                width: max-content;
-                margin: 50px auto;
-                border-radius: 10px;
-                background-color: #fff;
-                font-family: Arial, sans-serif;
-                font-size: 24px;
-                font-weight: bold;
-                overflow: hidden;
-            }
-            .cell {
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                height: 100%;
-                width: 50px;
-                padding: 8px;
-                border: 1px solid #333;
-            }
-            .cell.small-grid {
-                background-color: #f0f0f0;
-            }
-            .cell.empty {
-                color: #aaa;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="grid">
-    """
 
-    for i in range(9):
-        for j in range(9):
-            value = puzzle[i][j]
-            cell_class = "cell"
-            if (i // 3) % 2 == (j // 3) % 2:
-                cell_class += " small-grid"
-            if value == 0:
-                cell_class += " empty"
-                value = ""
-            html += f'            <div class="{cell_class}">{value}</div>\n'
-
-    html += """
-        </div>
-    </body>
-    </html>
+def sudoku_csp(puzzle):
     """
-
-    return html
-
-
-def generate_puzzle(difficulty):
-    puzzle = SudokuPuzzle(difficulty=difficulty)
+    Return the CSP of completing `puzzle` (a square grid, 0 for empty
+    cells), whose variable `i * size + j` is cell (i, j).
+    """
+    size = len(puzzle)
+    box = int(round(size ** 0.5))
+    csp = CSP()
+    for i in range(size):
+        for j in range(size):
+            value = int(puzzle[i][j])
+            csp.add_variable([value] if value else range(1, size + 1))
+    for i in range(size):
+        csp.add_constraint(AllDifferent(i * size + j for j in range(size)))
+        csp.add_constraint(AllDifferent(j * size + i for j in range(size)))
+    for i in range(0, size, box):
+        for j in range(0, size, box):
+            csp.add_constraint(AllDifferent(
+                (i + k) * size + j + l for k in range(box) for l in range(box)
+            ))
+    return csp
+
+SUDOKU_STYLE = """
+        .grid {
+            display: grid;
+            grid-template-columns: repeat(9, 1fr);
+            grid-template-rows: repeat(9, 1fr);
+
+            border: 2px solid #333;
+
+            width: max-content;
+            margin: 50px auto;
+            border-radius: 10px;
+            background-color: #fff;
+            font-family: Arial, sans-serif;
+            font-size: 24px;
+            font-weight: bold;
+            overflow: hidden;
+        }
+        .grid .cell {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            height: 100%;
+            width: 50px;
+            padding: 8px;
+            border: 1px solid #333;
+        }
+        .grid .cell.small-grid {
+            background-color: #f0f0f0;
+        }
+        .grid .cell.empty {
+            color: #aaa;
+        }
+"""
+
+# Cell markup, indexed by [shaded box][empty cell]
+SUDOKU_CELLS = [
+    ['<div class="cell">{}</div>\n'.format, '<div class="cell empty"></div>\n'.format],
+    ['<div class="cell small-grid">{}</div>\n'.format, '<div class="cell small-grid empty"></div>\n'.format],
+]
+
+def write_sudoku_grid(stream, puzzle):
+    """
+    Write the markup of a Sudoku grid to `stream`, one joined row at a time.
+    """
+    size = len(puzzle)
+    box = int(round(size ** 0.5))
+    stream.write('<div class="grid">\n')
+    for i in range(size):
+        stream.write("".join(
+            SUDOKU_CELLS[(i // box) % 2 == (j // box) % 2][value == 0](value)
+            for j, value in enumerate(map(int, puzzle[i]))
+        ))
+    stream.write('</div>\n')
+
+def generate_html(puzzle, seed=None):
+    meta = None if seed is None else {"puzzle-seed": seed}
+    return render_document("Sudoku Puzzle", [SUDOKU_STYLE], write_sudoku_grid, puzzle, meta=meta)
+
+
+def generate_puzzle(difficulty, seed=None):
+    """
+    Generate a puzzle from `seed` (a fresh random seed if None).
+    The same difficulty and seed always produce the same puzzle.
+    """
+    if seed is None:
+        seed = new_seed()
+    puzzle = SudokuPuzzle(difficulty=difficulty, rng=random.Random(seed))
+    puzzle.seed = seed
     generated_puzzle = puzzle.generate_puzzle()
     
-    solved_puzzle = [row.copy() for row in generated_puzzle]
+    solved_puzzle = SudokuGrid(generated_puzzle)
     incomplete_puzzle = puzzle.generate_incomplete_puzzle()
 
     puzzle.incomplete_puzzle = incomplete_puzzle
@@ -171,15 +174,62 @@ def generate_puzzle(difficulty):
 
     return (puzzle)
 
-def generate_html_file(puzzle, output_file):
-    html = generate_html(puzzle)
+def generate_puzzles(difficulty, times, seed=None, start=0):
+    """
+    Generate puzzles `start` to `start + times - 1` of the batch identified by
+    `seed`, and check all their solutions with a single vectorized validation
+    call. Puzzle i is always generated from `derive_seed(seed, i)`.
+    """
+    if seed is None:
+        seed = new_seed()
+    puzzles = [
+        generate_puzzle(difficulty, derive_seed(seed, i))
+        for i in range(start, start + times)
+    ]
+    if puzzles:
+        valid = validate_solutions(np.stack([p.solved_puzzle.cells for p in puzzles]))
+        if not valid.all():
+            raise ValueError(f"generated invalid solutions at {np.flatnonzero(~valid).tolist()}")
+    return puzzles
+
+def generate_unique_puzzle(difficulty, index, max_attempts=100, seed=None):
+    """
+    Generate a puzzle whose clues are not isomorphic to any puzzle already
+    recorded in `index` (a `FingerprintIndex`), and record it.
+    The first attempt uses `seed`, retries use seeds derived from it.
+    Return None if no new puzzle was found within `max_attempts`.
+    """
+    if seed is None:
+        seed = new_seed()
+    for attempt in range(max_attempts):
+        attempt_seed = seed if attempt == 0 else derive_seed(seed, "retry", attempt)
+        puzzle = generate_puzzle(difficulty, attempt_seed)
+        if index.add(sudoku_fingerprint(puzzle.incomplete_puzzle)):
+            return puzzle
+    return None
+
+def generate_html_file(puzzle, output_file, seed=None):
+    html = generate_html(puzzle, seed)
 
     with open("{}.html".format(output_file), "w") as file:
         file.write(html)
 
     return (html)
 
-def generate_sudoku_grid(puzzle, output_file):
+def generate_html_book(puzzles, output_file):
+    """
+    Write many puzzles into a single multi-page HTML document, one page per
+    puzzle. `puzzles` may be a generator; puzzles are rendered as they come.
+    """
+    with open("{}.html".format(output_file), "w") as file:
+        pages = ((write_sudoku_grid, (puzzle,)) for puzzle in puzzles)
+        return write_document(file, "Sudoku Puzzles", [SUDOKU_STYLE], pages)
+
+def generate_sudoku_grid(puzzle, output_file, seed=None):
+    # matplotlib is only needed to render, so it is not imported at startup
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Rectangle
+
     fig, ax = plt.subplots(figsize=(8, 8))
     ax.set_aspect("equal")
     ax.set_xlim([0, 9])
@@ -210,26 +260,38 @@ def generate_sudoku_grid(puzzle, output_file):
         ax.axvline(i, color="gray", linewidth=1)
         
     plt.tight_layout()
-    plt.savefig("{}.png".format(output_file), transparent=True, dpi=300)
+    metadata = None if seed is None else {"Seed": str(seed)}
+    plt.savefig("{}.png".format(output_file), transparent=True, dpi=300, metadata=metadata)
     #plt.savefig("{}.png".format(output_file), transparent=True, bbox_inches="tight", pad_inches=0)
     plt.close()
 
 def main():
     # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python sudoku.py {{ difficulty }} {{ times }} [output]")
+    if len(sys.argv) not in [3, 4, 5]:
+        sys.exit("Usage: python sudoku.py {{ difficulty }} {{ times }} [seed] [index]")
 
     difficulty = sys.argv[1]
     times = int(sys.argv[2])
+    seed = parse_seed(sys.argv[3] if len(sys.argv) >= 4 else None)
+    index = FingerprintIndex(sys.argv[4]) if len(sys.argv) == 5 else None
+    print("Seed: {}".format(seed))
 
     for i in range(times):
-        puzzle = generate_puzzle(difficulty)
+        if index is None:
+            puzzle = generate_puzzle(difficulty, derive_seed(seed, i))
+        else:
+            puzzle = generate_unique_puzzle(difficulty, index, seed=derive_seed(seed, i))
+            if puzzle is None:
+                sys.exit("Could not generate a new puzzle, the index is saturated.")
 
         #generate_html_file(puzzle.solved_puzzle, "puzzle_solved_{}".format(i))
         #generate_html_file(puzzle.incomplete_puzzle, "puzzle_incomplete_{}".format(i))
 
-        generate_sudoku_grid(puzzle.solved_puzzle, "puzzle_solved_{0}_{1}".format(difficulty, i))
-        generate_sudoku_grid(puzzle.incomplete_puzzle, "puzzle_{0}_{1}".format(difficulty, i))
+        generate_sudoku_grid(puzzle.solved_puzzle, "puzzle_solved_{0}_{1}".format(difficulty, i), puzzle.seed)
+        generate_sudoku_grid(puzzle.incomplete_puzzle, "puzzle_{0}_{1}".format(difficulty, i), puzzle.seed)
+
+    if index is not None:
+        index.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
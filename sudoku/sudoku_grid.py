@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class SudokuGrid:
+    """
+    An NxN Sudoku grid stored as a compact `np.uint8` array.
+    Empty cells hold 0. N must be a perfect square (9 for the classic grid).
+    """
+
+    __slots__ = ("cells", "box")
+
+    def __init__(self, cells):
+        self.cells = np.array(cells, dtype=np.uint8)
+        size = self.cells.shape[0]
+        self.box = int(round(size ** 0.5))
+        if self.cells.shape != (size, size) or self.box * self.box != size:
+            raise ValueError(f"invalid Sudoku grid shape {self.cells.shape}")
+
+    @classmethod
+    def empty(cls, size=9):
+        return cls(np.zeros((size, size), dtype=np.uint8))
+
+    @property
+    def size(self):
+        return self.cells.shape[0]
+
+    def copy(self):
+        grid = SudokuGrid.__new__(SudokuGrid)
+        grid.cells = self.cells.copy()
+        grid.box = self.box
+        return grid
+
+    def __getitem__(self, key):
+        return self.cells[key]
+
+    def __setitem__(self, key, value):
+        self.cells[key] = value
+
+    def __len__(self):
+        return self.size
+
+    def __array__(self, dtype=None, copy=None):
+        return self.cells if dtype is None else self.cells.astype(dtype)
+
+    def __eq__(self, other):
+        if not isinstance(other, SudokuGrid):
+            return NotImplemented
+        return np.array_equal(self.cells, other.cells)
+
+    def tolist(self):
+        return self.cells.tolist()
+
+    def is_valid(self):
+        """Return True if no digit is repeated in a row, column or box."""
+        return bool(validate_grids(self.cells[np.newaxis])[0])
+
+    def is_complete(self):
+        """Return True if every cell holds a digit."""
+        return bool(self.cells.all())
+
+    def is_solved(self):
+        return self.is_complete() and self.is_valid()
+
+
+def validate_grids(grids):
+    """
+    Validate a batch of Sudoku grids at once.
+
+    `grids` is an array of shape (B, N, N) holding digits 0..N, where 0 marks
+    an empty cell. Return a boolean array of shape (B,) that is True for each
+    grid in which no digit is repeated in a row, column or box.
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    batch, size = grids.shape[0], grids.shape[1]
+    box = int(round(size ** 0.5))
+    if batch == 0:
+        return np.zeros(0, dtype=bool)
+
+    # One-hot encode digits: counts[b, i, j, d] is 1 if cell (i, j) holds d + 1
+    counts = (grids[..., np.newaxis] == np.arange(1, size + 1, dtype=np.uint8))
+    counts = counts.astype(np.uint8)
+
+    rows = counts.sum(axis=2).max(axis=(1, 2))
+    columns = counts.sum(axis=1).max(axis=(1, 2))
+    boxes = (
+        counts.reshape(batch, box, box, box, box, size)
+        .sum(axis=(2, 4))
+        .max(axis=(1, 2, 3))
+    )
+    in_range = grids.reshape(batch, size * size).max(axis=1) <= size
+
+    return in_range & (rows <= 1) & (columns <= 1) & (boxes <= 1)
+
+
+def validate_solutions(grids):
+    """
+    Return a boolean array of shape (B,) that is True for each grid in the
+    batch that is completely and correctly filled.
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    batch, size = grids.shape[0], grids.shape[1]
+    complete = grids.reshape(batch, size * size).all(axis=1)
+    return complete & validate_grids(grids)
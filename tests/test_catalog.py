@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp import book
+from puzzleskdp.catalog import Catalog, CatalogWriter, decode, encode, parse_ids
+
+
+def sudoku_puzzle():
+    grid = [["1", "", "3", ""], ["", "4", "", "2"], ["2", "", "4", ""], ["", "3", "", "1"]]
+    solution = [["1", "2", "3", "4"], ["3", "4", "1", "2"], ["2", "1", "4", "3"], ["4", "3", "2", "1"]]
+    return book.BookPuzzle("sudoku", "Sudoku (easy)", grid, solution, 7, box=2, difficulty="easy")
+
+
+def crossword_puzzle():
+    solution = [["C", "A", "T"], [None, None, "O"], [None, None, "P"]]
+    grid = [["" if cell is not None else None for cell in row] for row in solution]
+    return book.BookPuzzle("crossword", "Fill-In", grid, solution, 8, words=["CAT", "TOP"])
+
+
+def word_search_puzzle():
+    grid = [["É", "Ñ", "X"], ["Ω", "A", "B"], ["C", "D", "E"]]
+    return book.BookPuzzle(
+        "wordsearch", "Word Search", grid, grid, 9, words=["ÉΩ"], highlights={(0, 0), (1, 0)}
+    )
+
+
+class CatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "puzzles.pkc")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertSamePuzzle(self, first, second):
+        for name in ["kind", "grid", "solution", "seed", "words", "box", "highlights", "difficulty"]:
+            self.assertEqual(getattr(first, name), getattr(second, name), name)
+
+    def test_encode_decode(self):
+        for puzzle in [sudoku_puzzle(), crossword_puzzle(), word_search_puzzle()]:
+            self.assertSamePuzzle(decode(encode(puzzle)), puzzle)
+
+    def test_crossword_numbers(self):
+        self.assertEqual(decode(encode(crossword_puzzle())).numbers, {(0, 0): 1, (0, 2): 2})
+
+    def test_append_and_read(self):
+        puzzles = [sudoku_puzzle(), crossword_puzzle(), word_search_puzzle()]
+        with CatalogWriter(self.path) as writer:
+            self.assertEqual([writer.append(puzzle, 0.5) for puzzle in puzzles], [0, 1, 2])
+        with Catalog(self.path) as catalog:
+            self.assertEqual(len(catalog), 3)
+            for read, puzzle in zip(catalog, puzzles):
+                self.assertSamePuzzle(read, puzzle)
+            self.assertEqual(catalog.metadata(0)["difficulty"], "easy")
+            self.assertEqual(catalog.metadata(2)["type"], "wordsearch")
+            with self.assertRaises(IndexError):
+                catalog[3]
+
+    def test_refresh_sees_new_records(self):
+        CatalogWriter(self.path).close()
+        with Catalog(self.path) as catalog, CatalogWriter(self.path) as writer:
+            self.assertEqual(len(catalog), 0)
+            writer.append(sudoku_puzzle())
+            catalog.refresh()
+            self.assertEqual(len(catalog), 1)
+            self.assertSamePuzzle(catalog[0], sudoku_puzzle())
+
+    def test_parse_ids(self):
+        self.assertEqual(list(parse_ids("2:5", 10)), [2, 3, 4])
+        self.assertEqual(list(parse_ids("7", 10)), [7])
+        self.assertEqual(list(parse_ids("8:", 10)), [8, 9])
+        self.assertEqual(list(parse_ids(None, 3)), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
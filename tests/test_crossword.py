@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.generators import ROOT, generator, load
+from puzzleskdp.solve_cache import ResultCache
+
+STRUCTURE = os.path.join(ROOT, "crossword", "data", "structure2.txt")
+WORDS = os.path.join(ROOT, "crossword", "data", "words2.txt")
+
+
+class CrosswordTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.generate = generator("crossword")
+        cls.crossword = cls.generate.Crossword(STRUCTURE, WORDS)
+
+    def creator(self, **options):
+        return self.generate.CrosswordCreator(self.crossword, 7, **options)
+
+    def test_solve_is_consistent_and_reproducible(self):
+        creator = self.creator()
+        assignment = creator.solve()
+        self.assertEqual(len(assignment), len(self.crossword.variables))
+        self.assertTrue(creator.consistent(assignment))
+        self.assertEqual(self.creator().solve(), assignment)
+
+    def test_pins(self):
+        var = self.crossword.variable_at(1, 0, "across")
+        for options in [{}, {"backjumping": True}]:
+            creator = self.creator(**options)
+            assignment = creator.solve({var: "bake"})
+            self.assertEqual(assignment[var], "BAKE")
+            self.assertTrue(creator.consistent(assignment))
+            with self.assertRaises(ValueError):
+                creator.solve({var: "BAKED"})
+
+    def test_local_search_pins(self):
+        local_search = load("crossword", "local_search")
+        var = self.crossword.variable_at(1, 0, "across")
+        filler = local_search.LocalSearchFiller(self.crossword, 3)
+        with self.assertRaises(ValueError):
+            filler.fill({var: "BAKED"})
+
+    def test_resolve_rejects_conflicting_change(self):
+        for options in [{}, {"backjumping": True}]:
+            creator = self.creator(**options)
+            assignment = creator.solve()
+            var = max(assignment, key=lambda v: v.length)
+            result = creator.resolve(assignment, {var: "Q" * var.length})
+            self.assertTrue(result is None or creator.consistent(result), options)
+
+    def test_resolve_replaces_word(self):
+        for options in [{}, {"backjumping": True}]:
+            creator = self.creator(**options)
+            assignment = creator.solve()
+            var = max(assignment, key=lambda v: v.length)
+            result = creator.resolve(assignment, {var: None})
+            self.assertIsNotNone(result)
+            self.assertNotEqual(result[var], assignment[var])
+            self.assertTrue(creator.consistent(result))
+
+    def test_cached_solves_match_uncached(self):
+        uncached = self.creator()
+        expected = [uncached.solve() for _ in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            with ResultCache(os.path.join(directory, "cache.db")) as cache:
+                self.creator(cache=cache).solve()
+                creator = self.creator(cache=cache)
+                self.assertEqual([creator.solve() for _ in range(3)], expected)
+                self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_cached_solve_with_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with ResultCache(os.path.join(directory, "cache.db")) as cache:
+                assignment = self.creator(cache=cache).solve(workers=2)
+                self.assertEqual(self.creator(cache=cache).solve(workers=2), assignment)
+
+
+if __name__ == "__main__":
+    unittest.main()
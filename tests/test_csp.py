@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.csp import CSP, AllDifferent, KeyEqual, ascending, first_unassigned
+from puzzleskdp.generators import generator
+
+
+class CSPTest(unittest.TestCase):
+
+    def test_remove_and_undo(self):
+        csp = CSP()
+        var = csp.add_variable([1, 2, 3])
+        mark = csp.mark()
+        self.assertTrue(csp.remove(var, 1))
+        self.assertEqual(csp.domains[var], {2, 3})
+        csp.undo(mark)
+        self.assertEqual(csp.domains[var], {1, 2, 3})
+
+    def test_undo_does_not_restore_absent_values(self):
+        csp = CSP()
+        var = csp.add_variable([1, 2])
+        mark = csp.mark()
+        self.assertTrue(csp.remove(var, 5))
+        csp.undo(mark)
+        self.assertEqual(csp.domains[var], {1, 2})
+
+    def test_all_different(self):
+        csp = CSP()
+        variables = [csp.add_variable([1, 2, 3]) for _ in range(3)]
+        csp.add_constraint(AllDifferent(variables))
+        self.assertEqual(csp.solve(first_unassigned, ascending), [1, 2, 3])
+
+    def test_all_different_without_solution(self):
+        csp = CSP()
+        variables = [csp.add_variable([1, 2]) for _ in range(3)]
+        csp.add_constraint(AllDifferent(variables))
+        self.assertIsNone(csp.solve())
+
+    def test_key_equal(self):
+        csp = CSP()
+        words = ["CAT", "TOP"]
+        x = csp.add_variable(range(len(words)))
+        y = csp.add_variable(range(len(words)))
+        # The last letter of x is the first letter of y
+        csp.add_constraint(KeyEqual(x, y, [w[-1] for w in words], [w[0] for w in words]))
+        self.assertEqual(csp.solve(), [0, 1])
+
+    def test_sudoku(self):
+        sudoku = generator("sudoku")
+        puzzle = sudoku.generate_puzzle("easy", 1)
+        grid = puzzle.incomplete_puzzle.tolist()
+        solution = sudoku.sudoku_csp(grid).solve()
+        size = len(grid)
+        self.assertEqual(
+            [solution[i * size:(i + 1) * size] for i in range(size)],
+            puzzle.solved_puzzle.tolist()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
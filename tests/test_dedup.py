@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.dedup import FingerprintIndex, fingerprint, sudoku_fingerprint, word_search_fingerprint
+from puzzleskdp.generators import generator
+
+
+def _add_range(path, start, stop):
+    with FingerprintIndex(path) as index:
+        for k in range(start, stop):
+            index.add(fingerprint(str(k)))
+
+
+class FingerprintIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "index")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_add_and_contains(self):
+        with FingerprintIndex(self.path) as index:
+            self.assertTrue(index.add(fingerprint("a")))
+            self.assertFalse(index.add(fingerprint("a")))
+            self.assertIn(fingerprint("a"), index)
+            self.assertNotIn(fingerprint("b"), index)
+            self.assertEqual(len(index), 1)
+
+    def test_grows_and_persists(self):
+        with FingerprintIndex(self.path, capacity=16) as index:
+            for k in range(1000):
+                index.add(fingerprint(str(k)))
+        with FingerprintIndex(self.path) as index:
+            self.assertEqual(len(index), 1000)
+            self.assertTrue(all(fingerprint(str(k)) in index for k in range(1000)))
+
+    def test_shared_by_processes(self):
+        # Overlapping ranges, so processes race to add the same fingerprints
+        processes = [
+            multiprocessing.Process(target=_add_range, args=(self.path, 300 * k, 300 * k + 600))
+            for k in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        with FingerprintIndex(self.path) as index:
+            self.assertEqual(len(index), 1500)
+
+
+class FingerprintTest(unittest.TestCase):
+
+    def test_sudoku_relabelled_and_rotated(self):
+        grid = generator("sudoku").generate_puzzle("easy", 1).solved_puzzle.tolist()
+        relabelled = [[10 - value for value in row] for row in grid]
+        rotated = [list(row) for row in zip(*grid[::-1])]
+        self.assertEqual(sudoku_fingerprint(grid), sudoku_fingerprint(relabelled))
+        self.assertEqual(sudoku_fingerprint(grid), sudoku_fingerprint(rotated))
+        self.assertNotEqual(sudoku_fingerprint(grid), sudoku_fingerprint(
+            generator("sudoku").generate_puzzle("easy", 2).solved_puzzle.tolist()
+        ))
+
+    def test_word_search_ignores_filler(self):
+        cells = {(0, 0), (0, 1), (0, 2)}
+        first = [list("CATX"), list("QWER"), list("ZZZZ"), list("PPPP")]
+        second = [list("CATY"), list("AWER"), list("ZKZZ"), list("PPQP")]
+        self.assertEqual(
+            word_search_fingerprint(first, ["CAT"], cells),
+            word_search_fingerprint(second, ["CAT"], cells)
+        )
+        moved = [list("XCAT"), list("QWER"), list("ZZZZ"), list("PPPP")]
+        self.assertNotEqual(
+            word_search_fingerprint(first, ["CAT"], cells),
+            word_search_fingerprint(moved, ["CAT"], {(0, 1), (0, 2), (0, 3)})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
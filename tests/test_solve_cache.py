@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.solve_cache import ResultCache, content_key
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_content_key(self):
+        self.assertEqual(content_key("a", {"x": 1, "y": 2}), content_key("a", {"y": 2, "x": 1}))
+        self.assertNotEqual(content_key("a", 1), content_key("a", 2))
+
+    def test_get_and_put(self):
+        with ResultCache(self.path) as cache:
+            self.assertIsNone(cache.get("k"))
+            cache.put("k", {"values": ["A", None]})
+            self.assertEqual(cache.get("k"), {"values": ["A", None]})
+            self.assertEqual(cache.stats()["hits"], 1)
+            self.assertEqual(cache.stats()["misses"], 1)
+        with ResultCache(self.path) as cache:
+            self.assertEqual(cache.get("k"), {"values": ["A", None]})
+
+    def test_evicts_least_recently_used(self):
+        value = "x" * 100
+        # Room for two results of 102 bytes
+        with ResultCache(self.path, max_bytes=250) as cache:
+            cache.put("a", value)
+            cache.put("b", value)
+            cache.get("a")
+            cache.put("c", value)
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual(cache.get("a"), value)
+            self.assertEqual(cache.get("c"), value)
+            self.assertLessEqual(cache.stats()["bytes"], 250)
+
+
+if __name__ == "__main__":
+    unittest.main()
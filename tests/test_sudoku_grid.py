@@ -0,0 +1,34 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.generators import generator, load
+
+
+class SudokuGridTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.grid = load("sudoku", "sudoku_grid")
+        cls.puzzle = generator("sudoku").generate_puzzle("easy", 1)
+
+    def test_validate(self):
+        solved = self.puzzle.solved_puzzle.tolist()
+        broken = [row[:] for row in solved]
+        broken[0][0], broken[0][1] = broken[0][1], broken[0][0]
+        incomplete = self.puzzle.incomplete_puzzle.tolist()
+        batch = np.array([solved, broken, incomplete])
+        self.assertEqual(self.grid.validate_grids(batch).tolist(), [True, False, True])
+        self.assertEqual(self.grid.validate_solutions(batch).tolist(), [True, False, False])
+
+    def test_empty_batch(self):
+        empty = np.zeros((0, 9, 9), dtype=np.uint8)
+        self.assertEqual(self.grid.validate_grids(empty).shape, (0,))
+        self.assertEqual(self.grid.validate_solutions(empty).shape, (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.generators import generator, load
+
+
+class WordSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.inputs = generator("wordsearch")
+        cls.placement = load("wordsearch", "word_search_placement")
+        cls.sampler = load("wordsearch", "word_search_sampler")
+        cls.layout = load("wordsearch", "word_search_layout")
+
+    def assertPlaced(self, grid, word_positions, words):
+        self.assertEqual(set(word_positions.values()), set(words))
+        for word in words:
+            cells = sorted(cell for cell, placed in word_positions.items() if placed == word)
+            self.assertTrue(set(word) >= {grid[i][j] for i, j in cells})
+
+    def test_places_every_word(self):
+        words = ["PYTHON", "PUZZLE", "GRID", "WORD", "SEARCH"]
+        for directions in [self.placement.DIRECTIONS, self.placement.ALL_DIRECTIONS]:
+            grid, word_positions = self.inputs.generate_word_search(words, 10, random.Random(1), directions)
+            self.assertEqual(len(grid), 10)
+            self.assertPlaced(grid, word_positions, words)
+
+    def test_places_non_ascii_words(self):
+        words = ["CAFÉ", "NIÑO", "ÄPFEL", "ΑΛΦΑ"]
+        grid, word_positions = self.inputs.generate_word_search(words, 8, random.Random(1))
+        self.assertPlaced(grid, word_positions, words)
+
+    def test_fitted_layout_is_reproducible(self):
+        words = ["PYTHON", "PUZZLE", "GRID", "WORD", "SEARCH", "LETTER", "HIDDEN"]
+        first = self.layout.optimize_layout(words, random.Random(3))
+        second = self.layout.optimize_layout(words, random.Random(3))
+        self.assertFalse(first.skipped)
+        self.assertEqual(first.size, second.size)
+        self.assertEqual(first.placements, second.placements)
+
+    def test_sample_words(self):
+        lines = ["CAT\tanimal", "DOG\tanimal", "CATALOG", "ROW", "THROW\tverb", "BIRD\tanimal"]
+        words = self.sampler.sample_words(lines, 3, random.Random(2), tag="animal")
+        self.assertEqual(sorted(words), ["BIRD", "CAT", "DOG"])
+        with self.assertRaises(ValueError):
+            self.sampler.sample_words(lines, 4, random.Random(2), tag="animal")
+        self.assertNotIn("CATALOG", self.sampler.sample_words(lines, 4, random.Random(2), max_length=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import json
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.dedup import FingerprintIndex, word_search_fingerprint
+from puzzleskdp.seeding import derive_seed, make_rng, parse_seed
+from word_search_inputs import generate_word_search
+from word_search_placement import DIRECTIONS
+from word_search_render import write_word_search
+from word_search_sampler import candidates, sample_loaded
+from word_search_verify import find_occurrences
+
+
+# Candidate words of the current batch, loaded once by the parent process and
+# inherited by forked workers, or sent once to each worker otherwise
+_vocabulary = []
+
+# Fingerprint indexes opened by this process, by path
+_indexes = {}
+
+
+def _share(vocabulary):
+    global _vocabulary
+    _vocabulary = vocabulary
+
+
+def answer_key(grid, words, seed, directions=DIRECTIONS):
+    """
+    Returns the answer key of a finished word search as a JSON-ready dictionary.
+
+    Parameters:
+    - grid (list): A 2D list of letters.
+    - words (list): The hidden words.
+    - seed (int): Seed the puzzle was generated from.
+    - directions (dict, optional): Directions the words may be read in.
+
+    Returns:
+    - key (dict): The seed, grid rows, sorted words, and for each word the
+      [row, col] cells it is read from, in reading order.
+    """
+    occurrences = find_occurrences(grid, words, directions)
+    return {
+        "seed": seed,
+        "grid": ["".join(row) for row in grid],
+        "words": sorted(words),
+        "answers": {word: [list(cell) for cell in found[0]] for word, found in sorted(occurrences.items()) if found},
+    }
+
+
+def generate_one(number, seed, size, words_num, output_dir, directions=DIRECTIONS, index=None,
+                 max_attempts=100, fit=False, time_budget=None):
+    """
+    Generates puzzle `number` of a batch from the shared vocabulary and writes
+    its HTML page and answer key to `output_dir`.
+
+    With `index`, the path of a `FingerprintIndex`, puzzles already recorded
+    there are regenerated from seeds derived from `seed`, up to `max_attempts`
+    times, and the new puzzle is recorded. `fit` and `time_budget` work as
+    in `word_search_inputs.generate_word_search_puzzle`.
+
+    Returns:
+    - result (tuple): (number, seed, words placed, words requested), with 0
+      words placed if no new puzzle was found.
+    """
+    for attempt in range(max_attempts):
+        attempt_seed = seed if attempt == 0 else derive_seed(seed, "retry", attempt)
+        rng = make_rng(attempt_seed)
+        words = sample_loaded(_vocabulary, words_num, rng)
+        grid, word_positions = generate_word_search(words, None if fit else size, rng, directions,
+                                                    time_budget=time_budget)
+        placed = sorted(set(word_positions.values()))
+        if index is None:
+            break
+        if index not in _indexes:
+            _indexes[index] = FingerprintIndex(index)
+        if _indexes[index].add(word_search_fingerprint(grid, placed, word_positions)):
+            break
+    else:
+        return number, seed, 0, words_num
+    seed = attempt_seed
+
+    name = os.path.join(output_dir, f"word_search_{number:04d}")
+    with open(name + ".html", "w") as f:
+        write_word_search(f, grid, word_positions, seed)
+    with open(name + ".json", "w") as f:
+        json.dump(answer_key(grid, placed, seed, directions), f)
+    return number, seed, len(placed), words_num
+
+
+def _generate(item):
+    return generate_one(*item)
+
+
+def generate_batch(count, size, words_num, words_file, output_dir, seed=None, workers=None,
+                   directions=DIRECTIONS, tag=None, progress=None, index=None, fit=False, time_budget=None):
+    """
+    Generates `count` word search puzzles across worker processes.
+
+    The words file is read once, keeping the words that fit a `size` grid
+    (and carry `tag`, if given). Workers are forked after loading, so they
+    share the parent's vocabulary instead of re-reading the file; where fork
+    is unavailable the list is sent to each worker once. Puzzle `k` is seeded
+    with `derive_seed(seed, k)`, so a batch is the same whatever the number
+    of workers, except with `index`: when two puzzles of the batch collide,
+    the one finished first keeps its seed, and which one that is depends on
+    the workers' timing. Each puzzle is written as `word_search_NNNN.html` with its
+    answer key in `word_search_NNNN.json`.
+
+    Parameters:
+    - count (int): Number of puzzles.
+    - size (int): The size of each grid.
+    - words_num (int): Number of words per puzzle.
+    - words_file (str): Path to the vocabulary, `WORD` or `WORD<TAB>tag,tag` lines.
+    - output_dir (str): Directory to write the puzzles to, created if needed.
+    - seed (int, optional): Seed of the batch. A fresh one is drawn if None.
+    - workers (int, optional): Worker processes. Defaults to the number of CPUs.
+    - directions (dict, optional): Directions words may run in.
+    - tag (str, optional): Only use words tagged with it.
+    - progress (callable, optional): Called with (done, count) after each puzzle.
+    - index (str, optional): Path of a fingerprint index of puzzles not to repeat, shared by the workers.
+    - fit (bool, optional): Shrink each grid to the smallest size fitting its words, `size` being their maximum length.
+    - time_budget (float, optional): Seconds the layout optimizer may spend on each grid. Not reproducible.
+
+    Returns:
+    - results (list): (number, seed, words placed, words requested) for each puzzle, in order.
+    """
+    seed = parse_seed(seed)
+    with open(words_file) as f:
+        vocabulary = list(candidates(f, size, tag))
+    os.makedirs(output_dir, exist_ok=True)
+    items = [
+        (number, derive_seed(seed, number), size, words_num, output_dir, directions, index, 100, fit,
+         time_budget)
+        for number in range(count)
+    ]
+
+    _share(vocabulary)
+    results = []
+    if workers == 1:
+        outcomes = map(_generate, items)
+    else:
+        if "fork" in multiprocessing.get_all_start_methods():
+            pool = multiprocessing.get_context("fork").Pool(workers)
+        else:
+            pool = multiprocessing.Pool(workers, _share, (vocabulary,))
+        outcomes = pool.imap_unordered(_generate, items)
+    try:
+        for result in outcomes:
+            results.append(result)
+            if progress is not None:
+                progress(len(results), count)
+    finally:
+        if workers != 1:
+            pool.close()
+            pool.join()
+        _share([])
+    return sorted(results)
+
+
+def print_progress(done, count):
+    """Reports batch progress on one updating line of standard error."""
+    sys.stderr.write(f"\r{done}/{count} puzzles")
+    if done == count:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+
+def main():
+    """
+    Generates a batch of word search puzzles.
+
+    Usage Example:
+    ```
+    python word_search_batch.py 200 15 20 vocabulary.txt puzzles/ [seed] [workers]
+    ```
+
+    This example writes 200 15x15 puzzles of 20 words each, with their answer
+    keys, to the 'puzzles' directory, and prints the seed of the batch.
+    """
+    if len(sys.argv) not in [6, 7, 8]:
+        sys.exit("Usage: python word_search_batch.py <count> <size> <words_num> <words_file> <output_dir> "
+                 "[seed] [workers]")
+
+    count, size, words_num = (int(value) for value in sys.argv[1:4])
+    words_file, output_dir = sys.argv[4], sys.argv[5]
+    seed = parse_seed(sys.argv[6] if len(sys.argv) >= 7 else None)
+    workers = int(sys.argv[7]) if len(sys.argv) == 8 else None
+
+    results = generate_batch(count, size, words_num, words_file, output_dir, seed, workers,
+                             progress=print_progress)
+    written = sum(1 for _, _, placed, _ in results if placed)
+    short = sum(1 for _, _, placed, requested in results if 0 < placed < requested)
+    print(f"{written} word search puzzles written to {output_dir} (seed {seed}), "
+          f"{short} with words left out, {len(results) - written} skipped.")
+
+
+if __name__ == '__main__':
+    main()
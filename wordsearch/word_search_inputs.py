@@ -1,157 +1,138 @@
+import os
 import random
 import sys
 from string import ascii_uppercase
 
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.dedup import word_search_fingerprint
+from puzzleskdp.seeding import make_rng, new_seed, parse_seed
+from word_search_layout import optimize_layout
+from word_search_placement import DIRECTIONS, place_words
+from word_search_render import render_word_search
+from word_search_sampler import sample_words
+from word_search_verify import WordAutomaton, fill_word_search, verify_word_search
 
-def generate_word_search(words, size):
+
+def generate_word_search(words, size, rng=None, directions=DIRECTIONS, max_attempts=10, time_budget=None):
     """
     Generates a word search puzzle grid and word positions based on a set of words and grid size.
 
+    Words are placed by `word_search_placement.place_words`, which prefers
+    placements sharing letters with words already on the grid and backtracks
+    when a word does not fit. Empty cells are filled without spelling a hidden
+    word a second time, and the grid is regenerated (up to `max_attempts` times)
+    if a hidden word still appears more than once in any direction; the grid
+    with the fewest such repeats is returned.
+
+    If `size` is None, the words are laid out by `word_search_layout.optimize_layout`
+    on the smallest grid it finds that fits them all; if `time_budget` is given
+    with a size, the densest of several layouts of that size is used. A
+    `time_budget` caps the layout search by wall-clock time, so the grid then
+    cannot be reproduced from `rng`'s seed.
+
     Parameters:
     - words (list): A list of words to include in the puzzle.
-    - size (int): The size of the word search grid.
+    - size (int): The size of the word search grid, or None for the smallest that fits the words.
+    - rng (random.Random, optional): Source of randomness. Defaults to the global `random` module.
+    - directions (dict, optional): Directions words may run in. Use `word_search_placement.ALL_DIRECTIONS` to allow all
+      eight directions, including words spelled backwards.
+    - max_attempts (int, optional): Number of grids to try before returning one with repeated words.
+    - time_budget (float, optional): Seconds the layout optimizer may spend on each grid. Not reproducible.
 
     Returns:
     - grid (list): A 2D list representing the word search puzzle grid.
     - word_positions (dict): A dictionary mapping the positions of the words in the grid.
     """
-    grid = [[' ' for _ in range(size)] for _ in range(size)]
-    word_positions = {}
-
-    for word in words:
-        word = word.upper()
-        if word in word_positions:
-            continue  # Skip duplicate words
-        placed = False
-        attempts = 0
-        max_attempts = 100
-
-        while not placed and attempts < max_attempts:
-            direction = random.choice(['horizontal', 'vertical', 'diagonal'])
-            row, col = random.randint(0, size - 1), random.randint(0, size - 1)
-
-            if direction == 'horizontal':
-                if col + len(word) <= size:
-                    valid_placement = all(grid[row][col + i] in (' ', word[i]) for i in range(len(word)))
-                    if valid_placement:
-                        for i in range(len(word)):
-                            grid[row][col + i] = word[i]
-                            word_positions[(row, col + i)] = word
-                        placed = True
-
-            elif direction == 'vertical':
-                if row + len(word) <= size:
-                    valid_placement = all(grid[row + i][col] in (' ', word[i]) for i in range(len(word)))
-                    if valid_placement:
-                        for i in range(len(word)):
-                            grid[row + i][col] = word[i]
-                            word_positions[(row + i, col)] = word
-                        placed = True
-
-            elif direction == 'diagonal':
-                if row + len(word) <= size and col + len(word) <= size:
-                    valid_placement = all(grid[row + i][col + i] in (' ', word[i]) for i in range(len(word)))
-                    if valid_placement:
-                        for i in range(len(word)):
-                            grid[row + i][col + i] = word[i]
-                            word_positions[(row + i, col + i)] = word
-                        placed = True
-
-            attempts += 1
-
-    for row in range(size):
-        for col in range(size):
-            if grid[row][col] == ' ':
-                grid[row][col] = random.choice(ascii_uppercase)
-
+    rng = random if rng is None else rng
+    automaton = WordAutomaton(words)
+
+    # (avoidable repeats, grid, word positions) of the best attempt so far
+    best = None
+    for _ in range(max_attempts):
+        if size is None or time_budget is not None:
+            layout = optimize_layout(words, rng, directions, size, time_budget=time_budget)
+            engine, placements = layout.engine, layout.placements
+        else:
+            engine, placements, skipped = place_words(words, size, rng, directions)
+        grid = engine.grid()
+
+        word_positions = {}
+        for word, (_, _, _, cells) in placements.items():
+            for cell in cells:
+                word_positions[divmod(cell, engine.size)] = word
+
+        fill_word_search(grid, words, rng, ascii_uppercase, automaton=automaton)
+        # Skipped words are reported with no occurrence; only placed words
+        # found more than once are repeats
+        repeated = [
+            word for word, count in verify_word_search(grid, placements, automaton=automaton).items()
+            if word in placements and count > 1
+        ]
+        # A word inside another hidden word (e.g. ROW in THROW) repeats in
+        # every grid, so only retry for repeats that can be avoided
+        avoidable = sum(
+            1 for word in repeated
+            if not any(word in other or word[::-1] in other for other in placements if other != word)
+        )
+        if best is None or avoidable < best[0]:
+            best = (avoidable, grid, word_positions)
+        if not avoidable:
+            break
+
+    _, grid, word_positions = best
     return grid, word_positions
 
 
-def generate_html_template(grid, word_positions):
+def generate_html_template(grid, word_positions, seed=None):
     """
     Generates an HTML template for displaying the word search puzzle grid.
 
     Parameters:
     - grid (list): A 2D list representing the word search puzzle grid.
     - word_positions (dict): A dictionary mapping the positions of the words in the grid.
+    - seed (int, optional): Seed the puzzle was generated from, recorded in a <meta> tag.
 
     Returns:
     - template (str): The HTML template for displaying the word search puzzle grid.
-    """
-    size = len(grid)
-    template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Word Search Puzzle</title>
-        <link rel="stylesheet" href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css">
-        <style>
-            .word-search {
-                /* display: inline-block; */
-                border: 1px solid #ccc;
-                border-radius: 8px;
-                padding: 10px;
-            }
-            .cell {
-                width: 40px;
-                height: 40px;
-                text-align: center;
-                line-height: 40px;
-                border: 1px solid #ccc;
-                font-weight: bold;
-                font-size: 18px;
-            }
-            .highlight {
-                background-color: yellow;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="row justify-content-center mt-5">
-                <div class="col">
-                    <div class="word-search">
-                        <div class="row justify-content-center mb-3">
-                            <h3>Word Search Puzzle</h3>
-                        </div>
-                        <div class="row justify-content-center">
-                            <div class="col">
-                                <div class="row justify-content-center">
 
+    Use `word_search_render.write_word_search` to write the page straight to a file instead.
     """
+    return render_word_search(grid, word_positions, seed)
 
-    for row in range(size):
-        template += '<div class="grid-row">'
-        for col in range(size):
-            if (row, col) in word_positions:
-                template += f'<div class="col cell highlight">{grid[row][col]}</div>'
-            else:
-                template += f'<div class="col cell">{grid[row][col]}</div>'
-        template += '</div>'
-
-    template += """
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
 
-    return template
+def generate_word_search_puzzle(size, words_num, words_file, index=None, max_attempts=100, seed=None,
+                                directions=DIRECTIONS, tag=None, fit=False, time_budget=None):
+    """
+    Generates a word search puzzle from words sampled out of `words_file`.
 
+    The file is streamed rather than loaded (see `word_search_sampler`), and
+    only words of at most `size` letters, tagged with `tag` if given, are
+    sampled, with no word inside another. With `fit`, the grid is shrunk to
+    the smallest size that fits the sampled words, and with `time_budget`
+    the layout optimizer may spend that long on each grid.
 
-def generate_word_search_puzzle(size, words_num, words_file):
-    words = []
-    with open(words_file) as f:
-        words_list = list(f.read().upper().splitlines())
-        words = random.sample(words_list, words_num)
+    The same arguments and `seed` always produce the same puzzle, unless a
+    `time_budget` cuts the layout search short; a fresh seed is drawn if
+    `seed` is None. The seed is recorded in the HTML output.
 
-    grid, word_positions = generate_word_search(words, size)
-    template = generate_html_template(grid, word_positions)
+    If `index` (a `FingerprintIndex`) is given, puzzles already recorded in it
+    are rejected and regenerated, up to `max_attempts` times, and the new
+    puzzle is recorded. Returns None if no new puzzle could be generated.
+    """
+    if seed is None:
+        seed = new_seed()
+    rng = make_rng(seed)
+    for _ in range(max_attempts):
+        with open(words_file) as f:
+            words = sample_words(f, words_num, rng, max_length=size, tag=tag)
+        grid, word_positions = generate_word_search(words, None if fit else size, rng, directions,
+                                                    time_budget=time_budget)
+        if index is None or index.add(word_search_fingerprint(grid, set(word_positions.values()), word_positions)):
+            break
+    else:
+        return None
+
+    template = generate_html_template(grid, word_positions, seed)
 
     return template
 
@@ -166,6 +147,7 @@ def main():
     - words_num (int): The number of words to include in the puzzle.
     - words_file (str): Path to a file containing the word vocabulary.
     - output (optional, str): Path to the output HTML file. If not provided, 'word_search_puzzle.html' will be used.
+    - seed (optional, int): Seed to reproduce a puzzle. If not provided, a random seed is used and printed.
 
     Usage Example:
     ```
@@ -174,20 +156,21 @@ def main():
 
     This example generates a word search puzzle with a grid size of 10x10, including 5 words randomly selected from the vocabulary file 'vocabulary.txt'. The output is saved to 'word_search_puzzle.html'.
     """
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python word_search_puzzle.py <size> <words_num> <words_file> [output]")
+    if len(sys.argv) not in [4, 5, 6]:
+        sys.exit("Usage: python word_search_puzzle.py <size> <words_num> <words_file> [output] [seed]")
 
     size = int(sys.argv[1])
     words_num = int(sys.argv[2])
     words_file = sys.argv[3]
+    output_file = sys.argv[4] if len(sys.argv) >= 5 else 'word_search_puzzle.html'
+    seed = parse_seed(sys.argv[5] if len(sys.argv) == 6 else None)
 
-    puzzle_html = generate_word_search_puzzle(size, words_num, words_file)
+    puzzle_html = generate_word_search_puzzle(size, words_num, words_file, seed=seed)
 
-    output_file = 'word_search_puzzle.html'
     with open(output_file, 'w') as f:
         f.write(puzzle_html)
 
-    print('Word search puzzle generated successfully.')
+    print(f'Word search puzzle generated successfully (seed {seed}).')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import math
+import random
+import time
+
+from word_search_placement import DIRECTIONS, place_words
+
+
+# Largest share of the letters of a word list assumed to overlap, used to
+# guess the smallest grid worth trying
+MAX_SHARED = 0.5
+
+
+class Layout:
+    """
+    An arrangement of words on a grid, before the empty cells are filled.
+
+    Attributes:
+    - size (int): The size of the grid.
+    - engine (PlacementEngine): The engine holding the unfilled grid.
+    - placements (dict): A dictionary mapping each placed word to (row, col, direction, cells).
+    - skipped (list): The words that could not be placed.
+    - shared (int): Number of letters shared by two or more words.
+    - covered (int): Number of cells covered by a word.
+    - tries (int): Number of arrangements tried to find this one.
+    """
+
+    def __init__(self, size, engine, placements, skipped, tries=1):
+        self.size = size
+        self.engine = engine
+        self.placements = placements
+        self.skipped = skipped
+        self.covered = sum(1 for count in engine.counts if count)
+        self.shared = sum(len(word) for word in placements) - self.covered
+        self.tries = tries
+
+    @property
+    def density(self):
+        """Share of the grid covered by words."""
+        return self.covered / (self.size * self.size)
+
+    def score(self):
+        """Ranks layouts of one grid size: more words placed, then more letters shared."""
+        return (len(self.placements), self.shared)
+
+
+def smallest_size(words):
+    """
+    Returns the smallest grid size worth trying for `words`: the longest word
+    must fit, and the grid must hold the letters left once at most
+    `MAX_SHARED` of them overlap.
+    """
+    letters = sum(len(word) for word in words)
+    return max(max(len(word) for word in words), math.ceil(math.sqrt(letters * (1 - MAX_SHARED))))
+
+
+def optimize_layout(words, rng=None, directions=DIRECTIONS, size=None, max_size=None,
+                    restarts=8, max_steps=500, time_budget=None):
+    """
+    Searches for a compact arrangement of `words`.
+
+    Each try places the words with `place_words`, which prefers the placements
+    sharing the most letters with the grid, so a try is scored as it is built.
+    With a fixed `size`, the best of `restarts` tries is kept: the one placing
+    the most words, then sharing the most letters (the densest).
+
+    Without a fixed size, grids grow from `smallest_size(words)` with one try
+    each until every word fits. The grid is then shrunk while one of up to
+    `restarts` tries fits every word in a grid one smaller, and the remaining
+    tries at the final size look for a denser arrangement.
+
+    The search is bounded by `restarts` and `max_steps` only, so the layout
+    depends on `rng` alone. With `time_budget`, no new try starts once that
+    many seconds have passed, except to grow the grid until every word fits
+    (or `max_size` is reached); the layout then also depends on the speed of
+    the machine and cannot be reproduced from a seed.
+
+    Parameters:
+    - words (list): The words to place.
+    - rng (random.Random, optional): Source of randomness. Defaults to the global `random` module.
+    - directions (dict, optional): Directions words may run in.
+    - size (int, optional): Fixed grid size. Searched for if None.
+    - max_size (int, optional): Largest grid size to try. Defaults to a size fitting one word per row.
+    - restarts (int, optional): Tries per grid size.
+    - max_steps (int, optional): Backtracking budget of each try, see `place_words`.
+    - time_budget (float, optional): Seconds after which no new alternative is tried. No limit if None.
+
+    Returns:
+    - layout (Layout): The best arrangement found; `layout.skipped` lists the words left out.
+    """
+    rng = random if rng is None else rng
+    words = sorted({word.upper() for word in words if word})
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    tries = 0
+
+    def expired():
+        return deadline is not None and time.monotonic() > deadline
+
+    def attempt(size):
+        nonlocal tries
+        tries += 1
+        return Layout(size, *place_words(words, size, rng, directions, max_steps), tries=tries)
+
+    def improve(best, count, until_fit=False):
+        for _ in range(count):
+            if expired():
+                break
+            layout = attempt(best.size)
+            if layout.score() > best.score():
+                best = layout
+            if until_fit and not best.skipped:
+                break
+        return best
+
+    if size is not None:
+        return improve(attempt(size), restarts - 1)
+
+    # Grow until every word fits
+    longest = max(len(word) for word in words)
+    max_size = max_size or max(longest, len(words))
+    best = attempt(smallest_size(words))
+    while best.skipped and best.size < max_size:
+        best = attempt(best.size + 1)
+    if best.skipped:
+        return best
+
+    # Shrink while a smaller grid still fits every word
+    while best.size > longest and not expired():
+        smaller = improve(attempt(best.size - 1), restarts - 1, until_fit=True)
+        if smaller.skipped:
+            break
+        best = smaller
+    return improve(best, restarts - 1)
@@ -0,0 +1,199 @@
+import random
+
+import numpy as np
+
+
+# Direction name -> (row step, column step)
+DIRECTIONS = {
+    'horizontal': (0, 1),
+    'vertical': (1, 0),
+    'diagonal': (1, 1),
+}
+
+# All eight directions, including words spelled backwards, for harder puzzles
+ALL_DIRECTIONS = {
+    'horizontal': (0, 1),
+    'horizontal_reversed': (0, -1),
+    'vertical': (1, 0),
+    'vertical_reversed': (-1, 0),
+    'diagonal': (1, 1),
+    'diagonal_reversed': (-1, -1),
+    'antidiagonal': (1, -1),
+    'antidiagonal_reversed': (-1, 1),
+}
+
+EMPTY = ' '
+
+
+class PlacementEngine:
+    """
+    Places words on a square grid, preferring placements that share letters
+    with words already on the grid.
+
+    The grid is stored both as a flat list of cells and as a `np.int32`
+    array of letter code points (0 for empty cells), which lets every start
+    position of a word in a given direction be checked with a few array
+    slices, whatever the alphabet. The reference count of each cell allows placements to be undone
+    when backtracking.
+    """
+
+    def __init__(self, size, rng=None, directions=DIRECTIONS):
+        self.size = size
+        self.rng = random if rng is None else rng
+        self.directions = directions
+        self.cells = [EMPTY] * (size * size)
+        self.counts = [0] * (size * size)
+        self.array = np.zeros((size, size), dtype=np.int32)
+
+    def line(self, row, col, direction, length):
+        """
+        Return the flat indices of the `length` cells starting at (row, col)
+        in `direction`.
+        """
+        dr, dc = self.directions[direction]
+        size = self.size
+        return tuple((row + dr * k) * size + col + dc * k for k in range(length))
+
+    def scan(self, word, direction):
+        """
+        Check every start position of `word` in `direction` at once.
+
+        Return arrays (rows, cols, shared) holding the start of each legal
+        placement and the number of letters it shares with the grid.
+        """
+        size = self.size
+        dr, dc = self.directions[direction]
+        span = len(word) - 1
+        row_lo, row_hi = max(0, -dr * span), size - max(0, dr * span)
+        col_lo, col_hi = max(0, -dc * span), size - max(0, dc * span)
+        if row_hi <= row_lo or col_hi <= col_lo:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, empty
+
+        shape = (row_hi - row_lo, col_hi - col_lo)
+        legal = np.ones(shape, dtype=bool)
+        shared = np.zeros(shape, dtype=np.intp)
+        for k, code in enumerate(map(ord, word)):
+            # Letters at offset k of the word, for every start position
+            view = self.array[
+                row_lo + dr * k:row_hi + dr * k,
+                col_lo + dc * k:col_hi + dc * k
+            ]
+            match = view == code
+            legal &= match | (view == 0)
+            shared += match
+
+        rows, cols = np.nonzero(legal)
+        return rows + row_lo, cols + col_lo, shared[rows, cols]
+
+    def candidates(self, word):
+        """
+        Yield the legal placements of `word`, best first: placements sharing
+        the most letters with the grid, then placements on empty cells, in
+        random order within each score. A word is never placed entirely on
+        top of other words.
+        """
+        length = len(word)
+        names = list(self.directions)
+        found = [self.scan(word, direction) for direction in names]
+        rows = np.concatenate([rows for rows, _, _ in found])
+        cols = np.concatenate([cols for _, cols, _ in found])
+        scores = np.concatenate([shared for _, _, shared in found])
+        kinds = np.repeat(np.arange(len(names)), [rows.size for rows, _, _ in found])
+
+        noise = np.random.default_rng(self.rng.getrandbits(64)).random(scores.size)
+        for i in np.lexsort((noise, -scores)):
+            if scores[i] == length:
+                continue
+            key = (int(rows[i]), int(cols[i]), names[kinds[i]])
+            yield key + (self.line(*key, length),)
+
+    def place(self, word, cells):
+        size = self.size
+        for letter, cell in zip(word, cells):
+            if self.counts[cell] == 0:
+                self.cells[cell] = letter
+                self.array[divmod(cell, size)] = ord(letter)
+            self.counts[cell] += 1
+
+    def remove(self, word, cells):
+        size = self.size
+        for cell in cells:
+            self.counts[cell] -= 1
+            if self.counts[cell] == 0:
+                self.cells[cell] = EMPTY
+                self.array[divmod(cell, size)] = 0
+
+    def grid(self):
+        """Return the grid as a 2D list of letters, empty cells as ' '."""
+        size = self.size
+        return [self.cells[row * size:(row + 1) * size] for row in range(size)]
+
+
+def place_words(words, size, rng=None, directions=DIRECTIONS, max_steps=2000):
+    """
+    Places words on a square grid with backtracking.
+
+    Words are placed longest first. When a word has no legal placement, the
+    previous word is moved to its next best placement and the search
+    continues. Once `max_steps` placements have been tried, the remaining
+    words are placed greedily and those that do not fit are skipped.
+
+    Parameters:
+    - words (list): The words to place. Duplicates are ignored.
+    - size (int): The size of the grid.
+    - rng (random.Random, optional): Source of randomness. Defaults to the global `random` module.
+    - directions (dict, optional): Mapping of direction name to (row step, column step).
+    - max_steps (int, optional): Budget of placements tried before giving up on backtracking.
+
+    Returns:
+    - engine (PlacementEngine): The engine holding the unfilled grid.
+    - placements (dict): A dictionary mapping each placed word to (row, col, direction, cells).
+    - skipped (list): The words that could not be placed.
+    """
+    engine = PlacementEngine(size, rng, directions)
+    order = sorted(
+        {word.upper() for word in words if 0 < len(word) <= size},
+        key=lambda word: (-len(word), word)
+    )
+    skipped = [word.upper() for word in words if not 0 < len(word) <= size]
+
+    chosen = [None] * len(order)
+    iterators = []
+    steps = 0
+    i = 0
+    while i < len(order):
+        word = order[i]
+        if i == len(iterators):
+            iterators.append(engine.candidates(word))
+        placement = next(iterators[i], None)
+        steps += 1
+
+        if placement is not None:
+            chosen[i] = placement
+            engine.place(word, placement[3])
+            i += 1
+            continue
+
+        # Backtrack to the most recent placed word, unless out of budget
+        previous = i - 1
+        while previous >= 0 and chosen[previous] is None:
+            previous -= 1
+        if previous < 0 or steps >= max_steps:
+            chosen[i] = None
+            i += 1
+            continue
+        del iterators[previous + 1:]
+        for j in range(previous, i):
+            if chosen[j] is not None:
+                engine.remove(order[j], chosen[j][3])
+                chosen[j] = None
+        i = previous
+
+    placements = {}
+    for word, placement in zip(order, chosen):
+        if placement is None:
+            skipped.append(word)
+        else:
+            placements[word] = placement
+    return engine, placements, skipped
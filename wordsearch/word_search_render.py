@@ -0,0 +1,105 @@
+import os
+import sys
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.html_stream import HtmlDocument, render_document, write_document
+
+
+WORD_SEARCH_STYLE = """
+        .word-search {
+            /* display: inline-block; */
+            border: 1px solid #ccc;
+            border-radius: 8px;
+            padding: 10px;
+        }
+        .word-search .cell {
+            width: 40px;
+            height: 40px;
+            text-align: center;
+            line-height: 40px;
+            border: 1px solid #ccc;
+            font-weight: bold;
+            font-size: 18px;
+        }
+        .word-search .highlight {
+            background-color: yellow;
+        }
+"""
+
+WORD_SEARCH_OPEN = """<div class="container">
+    <div class="row justify-content-center mt-5">
+        <div class="col">
+            <div class="word-search">
+                <div class="row justify-content-center mb-3">
+                    <h3>Word Search Puzzle</h3>
+                </div>
+                <div class="row justify-content-center">
+                    <div class="col">
+                        <div class="row justify-content-center">
+"""
+
+WORD_SEARCH_CLOSE = """                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+    </div>
+</div>
+"""
+
+CELL = '<div class="col cell">{}</div>'.format
+HIGHLIGHT_CELL = '<div class="col cell highlight">{}</div>'.format
+
+
+def write_word_search_grid(stream, grid, word_positions):
+    """
+    Writes the markup of a word search grid to a stream, one joined row at a time.
+
+    Parameters:
+    - stream (file-like): The text stream to write to.
+    - grid (list): A 2D list representing the word search puzzle grid.
+    - word_positions (dict): A dictionary mapping the positions of the words in the grid.
+      Pass an empty dictionary to render the puzzle without the answers highlighted.
+    """
+    stream.write(WORD_SEARCH_OPEN)
+    for row, letters in enumerate(grid):
+        stream.write('<div class="grid-row">')
+        stream.write("".join(
+            (HIGHLIGHT_CELL if (row, col) in word_positions else CELL)(letter)
+            for col, letter in enumerate(letters)
+        ))
+        stream.write('</div>\n')
+    stream.write(WORD_SEARCH_CLOSE)
+
+
+def render_word_search(grid, word_positions, seed=None):
+    """
+    Renders a single word search puzzle as a complete HTML document string.
+    """
+    meta = None if seed is None else {"puzzle-seed": seed}
+    return render_document("Word Search Puzzle", [WORD_SEARCH_STYLE], write_word_search_grid,
+                           grid, word_positions, meta=meta)
+
+
+def write_word_search(stream, grid, word_positions, seed=None):
+    """
+    Writes a single word search puzzle as a complete HTML document to a stream.
+    """
+    meta = None if seed is None else {"puzzle-seed": seed}
+    with HtmlDocument(stream, "Word Search Puzzle", [WORD_SEARCH_STYLE], meta) as document:
+        document.add_page(write_word_search_grid, grid, word_positions)
+
+
+def write_word_search_book(stream, puzzles):
+    """
+    Writes many word search puzzles into one multi-page HTML document.
+
+    Parameters:
+    - stream (file-like): The text stream to write to.
+    - puzzles (iterable): (grid, word_positions) pairs, rendered one page at a time as they are produced.
+
+    Returns:
+    - pages (int): The number of pages written.
+    """
+    pages = ((write_word_search_grid, puzzle) for puzzle in puzzles)
+    return write_document(stream, "Word Search Puzzles", [WORD_SEARCH_STYLE], pages)
@@ -0,0 +1,146 @@
+import math
+
+
+# Candidates kept per requested word, to replace duplicates and overlapping words
+OVERSAMPLE = 4
+
+TAG_SEPARATOR = "\t"
+
+
+def parse_line(line):
+    """
+    Parses a vocabulary line of the form `WORD` or `WORD<TAB>tag,tag`.
+
+    Parameters:
+    - line (str): A line of a words file.
+
+    Returns:
+    - word (str): The upper-cased word, empty for a blank line.
+    - tags (set): The lower-cased tags of the word.
+    """
+    word, _, tags = line.strip().partition(TAG_SEPARATOR)
+    return word.strip().upper(), {tag.strip().lower() for tag in tags.split(",") if tag.strip()}
+
+
+def candidates(lines, max_length=None, tag=None):
+    """
+    Yields the words of `lines` that fit a grid and carry a tag, one at a time.
+
+    Parameters:
+    - lines (iterable): Vocabulary lines, e.g. an open words file.
+    - max_length (int, optional): Longest word to keep, usually the grid size.
+    - tag (str, optional): Only keep words tagged with it (case-insensitive).
+    """
+    tag = tag.lower() if tag else None
+    for line in lines:
+        # Check the length before parsing tags or upper-casing, which most
+        # lines of a large vocabulary never need
+        word, _, tags = line.partition(TAG_SEPARATOR)
+        word = word.strip()
+        if not word or (max_length is not None and len(word) > max_length):
+            continue
+        if tag is not None and tag not in parse_line(line)[1]:
+            continue
+        yield word.upper()
+
+
+def reservoir(words, size, rng):
+    """
+    Returns a uniform random sample of up to `size` items of the iterable
+    `words` in a single pass, using memory for the sample only.
+
+    Uses the skipping reservoir algorithm ("Algorithm L"): after the
+    reservoir fills, the number of items to skip before the next replacement
+    is drawn directly, so most items cost no random draw at all.
+    """
+    sample = []
+    words = iter(words)
+    for word in words:
+        sample.append(word)
+        if len(sample) == size:
+            break
+    if len(sample) < size:
+        return sample
+
+    weight = math.exp(math.log(rng.random() or 1e-300) / size)
+    skip = int(math.log(rng.random() or 1e-300) / math.log1p(-weight)) if weight < 1 else 0
+    for word in words:
+        if skip:
+            skip -= 1
+            continue
+        sample[rng.randrange(size)] = word
+        weight *= math.exp(math.log(rng.random() or 1e-300) / size)
+        skip = int(math.log(rng.random() or 1e-300) / math.log1p(-weight)) if weight < 1 else 0
+    return sample
+
+
+def overlaps(word, chosen):
+    """Returns True if `word`, forwards or backwards, contains or is contained in a chosen word."""
+    backwards = word[::-1]
+    return any(
+        word in other or other in word or backwards in other or other in backwards
+        for other in chosen
+    )
+
+
+def sample_words(lines, count, rng, max_length=None, tag=None):
+    """
+    Samples words for a word search from a vocabulary, streaming it once.
+
+    Only words that fit the grid (and carry `tag`, if given) are considered.
+    A reservoir of `OVERSAMPLE` times `count` of them is drawn in one pass, so
+    memory does not grow with the vocabulary, then shuffled and read in order,
+    skipping duplicates and words that contain or are contained in a word
+    already chosen (e.g. ROW after THROW), which would be found twice.
+
+    Parameters:
+    - lines (iterable): Vocabulary lines, `WORD` or `WORD<TAB>tag,tag`; an open file is streamed.
+    - count (int): Number of words to sample.
+    - rng (random.Random): Source of randomness.
+    - max_length (int, optional): Longest word to keep, usually the grid size.
+    - tag (str, optional): Only sample words tagged with it, for themed puzzles.
+
+    Returns:
+    - words (list): `count` distinct words, none inside another.
+
+    Raises:
+    - ValueError: If the vocabulary has too few suitable words.
+    """
+    pool = reservoir(candidates(lines, max_length, tag), count * OVERSAMPLE, rng)
+    words = pick_words(pool, count, rng)
+    if len(words) < count:
+        theme = f" tagged {tag!r}" if tag else ""
+        fitting = f" of at most {max_length} letters" if max_length is not None else ""
+        raise ValueError(f"only found {len(words)} distinct words{theme}{fitting}, {count} requested")
+    return words
+
+
+def sample_loaded(vocabulary, count, rng):
+    """
+    Samples words for a word search from an in-memory list of candidate words,
+    e.g. `list(candidates(f, size))` loaded once and shared by many puzzles.
+    Works like `sample_words` without a pass over the vocabulary.
+    """
+    pool = rng.sample(vocabulary, min(len(vocabulary), count * OVERSAMPLE))
+    words = pick_words(pool, count, rng)
+    if len(words) < count:
+        raise ValueError(f"only found {len(words)} distinct words, {count} requested")
+    return words
+
+
+def pick_words(pool, count, rng):
+    """
+    Shuffles a pool of candidate words and returns up to `count` of them,
+    skipping duplicates and words overlapping a word already picked.
+    """
+    pool = list(pool)
+    rng.shuffle(pool)
+    words, seen = [], set()
+    for word in pool:
+        if word in seen or overlaps(word, words):
+            continue
+        seen.add(word)
+        words.append(word)
+        if len(words) == count:
+            break
+    return words
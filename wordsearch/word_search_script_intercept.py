@@ -1,8 +1,15 @@
+import os
 import random
+import sys
 from string import ascii_uppercase
 
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from puzzleskdp.seeding import make_rng, parse_seed
+from word_search_render import render_word_search, write_word_search
 
-def generate_word_search(words):
+
+def generate_word_search(words, rng=None):
+    rng = random if rng is None else rng
     size = max(len(word) for word in words)
     grid = [[' ' for _ in range(size)] for _ in range(size)]
     word_positions = {}  # Dictionary to store the positions of the words
@@ -14,8 +21,8 @@ def generate_word_search(words):
         max_attempts = 10  # Maximum number of attempts to find a valid placement
 
         while not placed and attempts < max_attempts:
-            direction = random.choice(['horizontal', 'vertical', 'diagonal'])
-            row, col = random.randint(0, size - 1), random.randint(0, size - 1)
+            direction = rng.choice(['horizontal', 'vertical', 'diagonal'])
+            row, col = rng.randint(0, size - 1), rng.randint(0, size - 1)
 
             if direction == 'horizontal':
                 if col + len(word) <= size:
@@ -63,87 +70,24 @@ def generate_word_search(words):
     for row in range(size):
         for col in range(size):
             if grid[row][col] == ' ':
-                grid[row][col] = random.choice(letters)
+                grid[row][col] = rng.choice(letters)
 
     return grid, word_positions
 
 
-def generate_html_template(grid, word_positions):
-    size = len(grid)
-    template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Word Search Puzzle</title>
-        <link rel="stylesheet" href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css">
-        <style>
-            .word-search {
-                /* display: inline-block; */
-                border: 1px solid #ccc;
-                border-radius: 8px;
-                padding: 10px;
-            }
-            .cell {
-                width: 40px;
-                height: 40px;
-                text-align: center;
-                line-height: 40px;
-                border: 1px solid #ccc;
-                font-weight: bold;
-                font-size: 18px;
-            }
-            .highlight {
-                background-color: yellow;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="row justify-content-center mt-5">
-                <div class="col">
-                    <div class="word-search">
-                        <div class="row justify-content-center mb-3">
-                            <h3>Word Search Puzzle</h3>
-                        </div>
-                        <div class="row justify-content-center">
-                            <div class="col">
-                                <div class="row justify-content-center">
-
-    """
-
-    for row in range(size):
-        template += '<div class="grid-row">'
-        for col in range(size):
-            if (row, col) in word_positions:
-                template += f'<div class="col cell highlight">{grid[row][col]}</div>'
-            else:
-                template += f'<div class="col cell">{grid[row][col]}</div>'
-        template += '</div>'
-
-    template += """
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-
-    return template
+def generate_html_template(grid, word_positions, seed=None):
+    return render_word_search(grid, word_positions, seed)
 
 
 def main():
     words = ['PYTHON', 'PROGRAMMING', 'PUZZLE', 'WORD', 'SEARCH', 'GRID', 'BOOTSTRAP', 'LONGWORD']
-    grid, word_positions = generate_word_search(words)
-    template = generate_html_template(grid, word_positions)
+    seed = parse_seed(sys.argv[1] if len(sys.argv) > 1 else None)
+    grid, word_positions = generate_word_search(words, make_rng(seed))
 
     with open('word_search_puzzle.html', 'w') as f:
-        f.write(template)
+        write_word_search(f, grid, word_positions, seed)
 
-    print('Word search puzzle generated successfully.')
+    print(f'Word search puzzle generated successfully (seed {seed}).')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,216 @@
+import random
+from collections import deque
+from string import ascii_uppercase
+
+from word_search_placement import ALL_DIRECTIONS, EMPTY
+
+
+# Line families scanned by the verifier, as (row step, column step). Each
+# direction of a puzzle is one of these, read forwards or backwards.
+LINE_STEPS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class WordAutomaton:
+    """
+    Aho-Corasick automaton over a set of words and their reversals.
+
+    Scanning a grid line forwards with it finds every word spelled forwards
+    and every word spelled backwards along that line in a single pass.
+    """
+
+    def __init__(self, words):
+        self.words = sorted({word.upper() for word in words if word})
+        self.goto = [{}]
+        self.fail = [0]
+        # outputs[state] lists (word index, reversed) of words ending at state
+        self.outputs = [[]]
+
+        for index, word in enumerate(self.words):
+            self._insert(word, (index, False))
+            if word[::-1] != word:
+                self._insert(word[::-1], (index, True))
+
+        # Breadth-first construction of failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for letter, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and letter not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(letter, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def _insert(self, string, output):
+        state = 0
+        for letter in string:
+            if letter not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.goto[state][letter] = len(self.goto) - 1
+            state = self.goto[state][letter]
+        self.outputs[state].append(output)
+
+    def step(self, state, letter):
+        while state and letter not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(letter, 0)
+
+    def scan(self, letters):
+        """
+        Yield (end, word index, reversed) for every match in `letters`,
+        where `end` is the position of the last letter matched.
+        """
+        state = 0
+        for position, letter in enumerate(letters):
+            state = self.step(state, letter)
+            for index, reversed_ in self.outputs[state]:
+                yield position, index, reversed_
+
+
+def grid_lines(size):
+    """
+    Return every row, column, diagonal and anti-diagonal of a square grid of
+    `size` as (step, cells) pairs, where `cells` are (row, col) tuples.
+    """
+    lines = []
+    for dr, dc in LINE_STEPS:
+        starts = set()
+        for row in range(size):
+            for col in range(size):
+                # A line starts at a cell whose predecessor is off the grid
+                if not (0 <= row - dr < size and 0 <= col - dc < size):
+                    starts.add((row, col))
+        for row, col in sorted(starts):
+            cells = []
+            while 0 <= row < size and 0 <= col < size:
+                cells.append((row, col))
+                row, col = row + dr, col + dc
+            if len(cells) > 1:
+                lines.append(((dr, dc), cells))
+    return lines
+
+
+def _allowed(directions):
+    """
+    Return the set of (step, reversed) pairs readable in `directions`.
+    """
+    steps = set(directions.values())
+    return {
+        (step, reversed_)
+        for step in LINE_STEPS
+        for reversed_ in (False, True)
+        if (tuple(-d for d in step) if reversed_ else step) in steps
+    }
+
+
+def find_occurrences(grid, words, directions=ALL_DIRECTIONS, automaton=None):
+    """
+    Finds every occurrence of every word in a finished grid.
+
+    Runs in time linear in the grid area (plus the number of matches), as
+    each grid line is scanned once by an Aho-Corasick automaton.
+
+    Parameters:
+    - grid (list): A 2D list of letters.
+    - words (list): The words to look for.
+    - directions (dict, optional): Directions a word may be read in. Defaults to all eight.
+    - automaton (WordAutomaton, optional): A prebuilt automaton for `words`, to reuse across grids.
+
+    Returns:
+    - occurrences (dict): A dictionary mapping each word to a list of occurrences,
+      each a tuple of (row, col) cells in reading order.
+    """
+    automaton = automaton or WordAutomaton(words)
+    allowed = _allowed(directions)
+    occurrences = {word: [] for word in automaton.words}
+
+    for step, cells in grid_lines(len(grid)):
+        letters = [grid[row][col] for row, col in cells]
+        for end, index, reversed_ in automaton.scan(letters):
+            if (step, reversed_) not in allowed:
+                continue
+            word = automaton.words[index]
+            found = cells[end - len(word) + 1:end + 1]
+            occurrences[word].append(tuple(reversed(found)) if reversed_ else tuple(found))
+
+    return occurrences
+
+
+def verify_word_search(grid, words, directions=ALL_DIRECTIONS, automaton=None):
+    """
+    Returns the words that do not appear exactly once in the grid, mapped to
+    their number of occurrences. An empty dictionary means the puzzle is valid.
+    """
+    occurrences = find_occurrences(grid, words, directions, automaton)
+    return {word: len(found) for word, found in occurrences.items() if len(found) != 1}
+
+
+def fill_word_search(grid, words, rng=None, letters=ascii_uppercase,
+                     directions=ALL_DIRECTIONS, automaton=None):
+    """
+    Fills the empty cells of a grid with random letters without spelling any
+    of `words` a second time.
+
+    Each cell is filled in turn with a letter for which no word reads through
+    the cell along a fully filled stretch of a line. Only the cells within one
+    word length of the cell are rescanned, so filling is linear in the grid
+    area. If every letter would create a word, a random one is used and the
+    duplicate is left for `verify_word_search` to report.
+
+    Parameters:
+    - grid (list): A 2D list of letters, with ' ' for empty cells. Modified in place.
+    - words (list): The hidden words.
+    - rng (random.Random, optional): Source of randomness. Defaults to the global `random` module.
+    - letters (str, optional): The letters to fill with.
+    - directions (dict, optional): Directions a word may be read in. Defaults to all eight.
+    - automaton (WordAutomaton, optional): A prebuilt automaton for `words`.
+
+    Returns:
+    - grid (list): The filled grid.
+    """
+    rng = random if rng is None else rng
+    automaton = automaton or WordAutomaton(words)
+    allowed = _allowed(directions)
+    reach = max((len(word) for word in automaton.words), default=1) - 1
+    size = len(grid)
+    letters = list(letters)
+
+    for row in range(size):
+        for col in range(size):
+            if grid[row][col] != EMPTY:
+                continue
+
+            # The filled stretches through (row, col) along each line family
+            segments = []
+            for step in LINE_STEPS:
+                dr, dc = step
+                before = []
+                r, c = row - dr, col - dc
+                while len(before) < reach and 0 <= r < size and 0 <= c < size and grid[r][c] != EMPTY:
+                    before.append(grid[r][c])
+                    r, c = r - dr, c - dc
+                after = []
+                r, c = row + dr, col + dc
+                while len(after) < reach and 0 <= r < size and 0 <= c < size and grid[r][c] != EMPTY:
+                    after.append(grid[r][c])
+                    r, c = r + dr, c + dc
+                if before or after:
+                    segments.append((step, before[::-1], after))
+
+            rng.shuffle(letters)
+            grid[row][col] = letters[0]
+            for letter in letters:
+                if not any(
+                    end >= len(before)
+                    and end - len(automaton.words[index]) < len(before)
+                    and (step, reversed_) in allowed
+                    for step, before, after in segments
+                    for end, index, reversed_ in automaton.scan(before + [letter] + after)
+                ):
+                    grid[row][col] = letter
+                    break
+
+    return grid